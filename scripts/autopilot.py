@@ -1,28 +1,52 @@
 #!/usr/bin/env python3
 import argparse
+import errno
+import heapq
 import json
 import logging
+import mmap
+import multiprocessing
+import multiprocessing.connection
 import os
+import random
 import re
+import select
+import shutil
 import signal
 import stat
 import subprocess
 import sys
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple, Union
 
+try:
+    import tomllib
+except ImportError:  # Python < 3.11 (stock macOS python3): regex scan fallback.
+    tomllib = None
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # Optional speedup; stdlib json also parses bytes directly.
+    _json_loads = json.loads
+
+from dirwatch import DirWatcher, count_md_files, link_tmpfile, proc_ps_line, tmp_name
 from task_board import (
     add_task,
     claim_task,
     complete_task,
+    current_task_id,
     ensure_task_board,
     get_task,
     list_dispatchable_tasks,
     list_tasks,
     mark_task_failed,
-    set_dispatch,
+    receipt_index_path,
+    set_dispatch_many,
 )
 
 
@@ -35,10 +59,39 @@ DISPATCH_MAX_PER_SCAN = int(os.environ.get("AUTOPILOT_DISPATCH_MAX_PER_SCAN", "3
 ROLE_BOUNDARY_MODE = os.environ.get("AUTOPILOT_ROLE_BOUNDARY_MODE", "enforce").strip().lower()
 LOG = logging.getLogger("autopilot")
 USE_KQUEUE = (sys.platform == "darwin") and (os.environ.get("AUTOPILOT_USE_KQUEUE", "1") != "0")
-
-
-@dataclass
+USE_INOTIFY = sys.platform.startswith("linux") and (os.environ.get("AUTOPILOT_USE_INOTIFY", "1") != "0")
+# Opt-in: have codex write --output-last-message into a pipe (/dev/fd/N) instead of a file.
+LAST_MSG_PIPE = os.name == "posix" and os.environ.get("AUTOPILOT_LAST_MSG_PIPE", "0") == "1"
+_WATCHER: Optional[DirWatcher] = None
+_FM_CACHE: "OrderedDict[Tuple[str, int, int], Dict[str, object]]" = OrderedDict()
+_FM_CACHE_MAX = 4096
+_STAT_CACHE: Dict[str, Tuple[int, int, object]] = {}
+# Per-message retry state; one daemon per role owns these files.
+_RETRIES_CACHE: Dict[Path, Dict] = {}
+# _now() output for the current epoch second; receipts/memory/retries often share one.
+_NOW_SEC = -1
+_NOW_STR = ""
+
+_RE_ROLE_WT = re.compile(r"^## Role worktrees\s*$", re.M)
+_RE_CFG_MODEL = re.compile(r'^\s*(model|model_provider)\s*=\s*"([^"]+)"\s*$', re.M)
+_RE_OBJECTIVE = re.compile(r"^[-*]?\s*(目标|objective)[^:：]*[:：]\s*(.+)$", re.I)
+_RE_TASK_HDR = re.compile(r"^#\s*task\b", re.I)
+_RE_H2 = re.compile(r"^##\s+")
+_RE_LABEL_ITEM = re.compile(r"^[-*]\s+[^:：]+[:：]\s*$")
+_RE_ACCEPT_HDR = re.compile(r"^##\s*(acceptance|验收标准)\b", re.I)
+_RE_LIST_ITEM = re.compile(r"^[-*]\s+(.+)$")
+_RE_NUM_ITEM = re.compile(r"^\d+[.)]\s+(.+)$")
+# Frontmatter: a line that strips to `---` (whitespace class excludes the newline), and
+# header lines that are either `  - item` or `key: value` with key [A-Za-z0-9_-]+.
+_RE_FM_CLOSE = re.compile(r"^[^\S\n]*---[^\S\n]*$", re.M)
+_RE_FM_LINE = re.compile(r"^(?:  - (.*)|([A-Za-z0-9_-]+):(.*))$", re.M)
+
+
+@dataclass(frozen=True)
 class SessionPaths:
+    # Manual __slots__: dataclass(slots=True) needs Python 3.10 (stock macOS python3 is 3.9).
+    __slots__ = ("main_worktree", "session_root", "shared", "roles", "artifacts", "bus", "state")
+
     main_worktree: Path
     session_root: Path
     shared: Path
@@ -48,13 +101,23 @@ class SessionPaths:
     state: Path
 
 
+def _now() -> str:
+    global _NOW_SEC, _NOW_STR
+    sec = int(time.time())
+    if sec != _NOW_SEC:
+        _NOW_SEC = sec
+        _NOW_STR = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+    return _NOW_STR
+
+
 def init_logging() -> None:
     if LOG.handlers:
         return
     h = logging.StreamHandler(sys.stderr)
     h.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [autopilot] %(message)s"))
     LOG.addHandler(h)
-    LOG.setLevel(logging.INFO)
+    level = getattr(logging, os.environ.get("AUTOPILOT_LOG_LEVEL", "INFO").strip().upper(), logging.INFO)
+    LOG.setLevel(level if isinstance(level, int) else logging.INFO)
     LOG.propagate = False
 
 
@@ -82,79 +145,27 @@ def _signal_process_context(*, session: str, role: str) -> str:
     except Exception as e:
         cwd = f"<cwd-error:{e}>"
 
-    ps_line = "<ps-unavailable>"
-    try:
-        ps_attempts = [
-            ["ps", "-o", "pid,ppid,pgid,sid,tty,stat,etime,command", "-p", str(pid)],
-            ["ps", "-o", "pid,ppid,pgid,sess,tty,stat,etime,command", "-p", str(pid)],
-        ]
-        last_err = ""
-        for ps_cmd in ps_attempts:
-            p = subprocess.run(
-                ps_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=False,
-            )
-            if p.returncode == 0 and p.stdout.strip():
-                ps_line = " | ".join([ln.strip() for ln in p.stdout.splitlines() if ln.strip()])
-                break
-            if p.stderr.strip():
-                last_err = f"<ps-rc={p.returncode} err={p.stderr.strip()}>"
-            else:
-                last_err = f"<ps-rc={p.returncode}>"
-        if ps_line == "<ps-unavailable>" and last_err:
-            ps_line = last_err
-    except Exception as e:
-        ps_line = f"<ps-exception:{e}>"
+    prefix = f"session={session} role={role} pid={pid} ppid={ppid} pgid={pgid} sid={sid} cwd={cwd}"
+    if sys.platform.startswith("linux"):
+        return f"{prefix} ps=\"{proc_ps_line(pid)}\""
+    return prefix
 
-    return (
-        f"session={session} role={role} pid={pid} ppid={ppid} pgid={pgid} sid={sid} "
-        f"cwd={cwd} ps=\"{ps_line}\""
-    )
+
+def _dir_watcher() -> DirWatcher:
+    global _WATCHER
+    if _WATCHER is None:
+        _WATCHER = DirWatcher(use_kqueue=USE_KQUEUE, use_inotify=USE_INOTIFY)
+    return _WATCHER
 
 
 def _wait_for_dir_change(path: Path, timeout_s: float) -> None:
     if timeout_s <= 0:
         return
-    if not USE_KQUEUE or not path.is_dir():
+    w = _dir_watcher()
+    if not w.watch(path):
         time.sleep(timeout_s)
         return
-    try:
-        import select  # local import: only supported on some platforms
-
-        oflag = getattr(os, "O_EVTONLY", os.O_RDONLY)
-        fd = os.open(str(path), oflag)
-        try:
-            kq = select.kqueue()
-            try:
-                ev = select.kevent(
-                    fd,
-                    filter=select.KQ_FILTER_VNODE,
-                    flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
-                    fflags=(
-                        select.KQ_NOTE_WRITE
-                        | select.KQ_NOTE_EXTEND
-                        | select.KQ_NOTE_ATTRIB
-                        | select.KQ_NOTE_RENAME
-                        | select.KQ_NOTE_DELETE
-                    ),
-                )
-                kq.control([ev], 0, 0)
-                kq.control(None, 1, timeout_s)
-            finally:
-                try:
-                    kq.close()
-                except Exception:
-                    pass
-        finally:
-            try:
-                os.close(fd)
-            except Exception:
-                pass
-    except Exception:
-        time.sleep(timeout_s)
+    w.wait_on(path, timeout_s)
 
 
 def _run(cmd: List[str], cwd: Optional[Path] = None, timeout_s: Optional[float] = None) -> str:
@@ -209,13 +220,19 @@ def read_text(path: Path) -> str:
     return path.read_text(encoding="utf-8")
 
 
-def atomic_write(path: Path, text: str) -> None:
+def atomic_write_bytes(path: Path, data: bytes) -> None:
     mkdirp(path.parent)
-    tmp = path.parent / f".tmp.{path.name}.{os.getpid()}"
-    tmp.write_text(text, encoding="utf-8")
+    if link_tmpfile(path, [data]):
+        return
+    tmp = path.parent / tmp_name(path.name)
+    tmp.write_bytes(data)
     tmp.replace(path)
 
 
+def atomic_write(path: Path, text: str) -> None:
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
 def new_id(prefix: str = "") -> str:
     import secrets
 
@@ -249,42 +266,56 @@ def enqueue_bus_message(
 ) -> Path:
     mid = mid or new_id("")
     out = sp.bus / "inbox" / to_role / f"{mid}.md"
-    lines = [
-        "---",
-        f"id: {mid}",
-        f"from: {from_role}",
-        f"to: {to_role}",
-        f"intent: {intent}",
-        f"thread: {thread}",
-        f"risk: {risk}",
-    ]
+    buf = bytearray(b"---\n")
+    buf += (
+        f"id: {mid}\nfrom: {from_role}\nto: {to_role}\nintent: {intent}\nthread: {thread}\nrisk: {risk}\n"
+    ).encode("utf-8")
     if task_id.strip():
-        lines.append(f"task_id: {task_id.strip()}")
+        buf += f"task_id: {task_id.strip()}\n".encode("utf-8")
     acc = _normalize_list(acceptance)
     if acc:
-        lines.append("acceptance:")
+        buf += b"acceptance:\n"
         for a in acc:
             aa = a.replace('"', "'")
-            lines.append(f'  - "{aa}"')
-    lines.extend(["---", "", body.rstrip(), ""])
-    atomic_write(out, "\n".join(lines))
+            buf += f'  - "{aa}"\n'.encode("utf-8")
+    buf += b"---\n\n"
+    buf += body.rstrip().encode("utf-8")
+    buf += b"\n"
+    atomic_write_bytes(out, buf)
     return out
 
 
 def list_roles(sp: SessionPaths) -> List[str]:
-    roles: List[str] = []
-    if sp.roles.is_dir():
-        for d in sp.roles.iterdir():
-            if d.is_dir():
-                roles.append(d.name)
-    return [r for r in ROLE_ORDER if r in roles]
+    """
+    Known roles present under roles/, in ROLE_ORDER. Rescanned only when the roles
+    dir's stat changes (adding/removing an entry bumps its mtime).
+    """
+    return list(_read_cached(sp.roles, _scan_roles, []))
+
+
+def _scan_roles(roles_dir: Path) -> List[str]:
+    present = set()
+    try:
+        with os.scandir(roles_dir) as it:
+            for e in it:
+                # d_type answers is_dir() without a stat (symlinked role dirs still count).
+                if e.is_dir():
+                    present.add(e.name)
+    except OSError:
+        return []
+    return [r for r in ROLE_ORDER if r in present]
 
 
 def parse_role_worktrees(session_md: Path) -> Dict[str, Path]:
-    if not session_md.exists():
-        return {}
+    """
+    `## Role worktrees` of SESSION.md; re-parsed only when the file's stat changes.
+    """
+    return dict(_read_cached(session_md, _parse_role_worktrees, {}))
+
+
+def _parse_role_worktrees(session_md: Path) -> Dict[str, Path]:
     text = read_text(session_md)
-    m = re.search(r"^## Role worktrees\s*$", text, flags=re.M)
+    m = _RE_ROLE_WT.search(text)
     if not m:
         return {}
     start = m.end()
@@ -306,6 +337,11 @@ def parse_role_worktrees(session_md: Path) -> Dict[str, Path]:
 
 
 class DirLock:
+    """
+    mkdir-based lock. Waiters back off exponentially with jitter from 10 ms up to
+    `poll_s`; with a dir watcher the holder's rmdir wakes them before that.
+    """
+
     def __init__(self, lock_dir: Path, poll_s: float = 0.2, timeout_s: float = 60.0):
         self.lock_dir = lock_dir
         self.poll_s = poll_s
@@ -314,55 +350,106 @@ class DirLock:
     def __enter__(self):
         mkdirp(self.lock_dir.parent)
         start = time.time()
+        delay = min(0.01, self.poll_s)
         while True:
             try:
                 os.mkdir(self.lock_dir)
                 (self.lock_dir / "pid").write_text(str(os.getpid()), encoding="utf-8")
                 return self
             except FileExistsError:
-                if time.time() - start > self.timeout_s:
+                remaining = self.timeout_s - (time.time() - start)
+                if remaining < 0:
                     raise TimeoutError(f"lock timeout: {self.lock_dir}")
-                time.sleep(self.poll_s)
+                _wait_for_dir_change(
+                    self.lock_dir.parent, min(delay + random.uniform(0, delay / 2), self.poll_s, remaining)
+                )
+                delay = min(delay * 1.7, self.poll_s)
 
     def __exit__(self, exc_type, exc, tb):
         try:
-            for p in self.lock_dir.glob("*"):
-                try:
-                    p.unlink()
-                except Exception:
-                    pass
-            os.rmdir(self.lock_dir)
-        except Exception:
+            os.unlink(self.lock_dir / "pid")
+        except OSError:
             pass
+        try:
+            os.rmdir(self.lock_dir)
+        except OSError as e:
+            if e.errno != errno.ENOTEMPTY:
+                return
+            # Something else was dropped in the lock dir: clear it and retry.
+            try:
+                with os.scandir(self.lock_dir) as it:
+                    for entry in it:
+                        try:
+                            os.unlink(entry.path)
+                        except OSError:
+                            pass
+                os.rmdir(self.lock_dir)
+            except OSError:
+                pass
+
+
+def _session_leaves(sp: SessionPaths, roles: List[str]) -> List[Path]:
+    leaves = [
+        sp.artifacts / "locks",
+        sp.artifacts / "autopilot",
+        sp.bus / "outbox",
+        sp.state / "processing",
+        sp.state / "done",
+        sp.state / "memory",
+    ]
+    for r in roles:
+        leaves.append(sp.bus / "inbox" / r)
+        leaves.append(sp.bus / "deadletter" / r)
+        leaves.append(sp.state / "archive" / r)
+    return leaves
 
 
 def ensure_session_dirs(sp: SessionPaths, roles: List[str]) -> None:
+    # One stat per leaf: if every leaf dir and the task board exist, so do their parents.
+    # Anything missing (e.g. deleted by hand) falls through to the repair pass below.
+    if os.path.isfile(sp.state / "tasks" / "tasks.json") and all(
+        os.path.isdir(d) for d in _session_leaves(sp, roles)
+    ):
+        return
     # Best-effort mkdir to keep workers robust.
-    mkdirp(sp.artifacts / "locks")
-    mkdirp(sp.artifacts / "autopilot")
-    mkdirp(sp.bus / "inbox")
-    mkdirp(sp.bus / "outbox")
-    mkdirp(sp.bus / "deadletter")
-    mkdirp(sp.state / "processing")
-    mkdirp(sp.state / "done")
-    mkdirp(sp.state / "archive")
-    mkdirp(sp.state / "tasks")
-    mkdirp(sp.state / "memory")
+    for d in (
+        sp.artifacts / "locks",
+        sp.artifacts / "autopilot",
+        sp.bus / "inbox",
+        sp.bus / "outbox",
+        sp.bus / "deadletter",
+        sp.state / "processing",
+        sp.state / "done",
+        sp.state / "tasks",
+        sp.state / "archive",
+        sp.state / "memory",
+    ):
+        os.makedirs(d, exist_ok=True)
     ensure_task_board(sp.session_root)
     for r in roles:
-        mkdirp(sp.bus / "inbox" / r)
-        mkdirp(sp.bus / "deadletter" / r)
-        mkdirp(sp.state / "archive" / r)
+        os.makedirs(sp.bus / "inbox" / r, exist_ok=True)
+        os.makedirs(sp.bus / "deadletter" / r, exist_ok=True)
+        os.makedirs(sp.state / "archive" / r, exist_ok=True)
 
 
 def _count_md_files(path: Path) -> int:
+    if _WATCHER is not None and _WATCHER.watching(path):
+        return _WATCHER.md_count(path)
+    return count_md_files(path)
+
+
+def _task_board_sig(sp: SessionPaths) -> Optional[Tuple[int, int]]:
     try:
-        return sum(1 for p in path.glob("*.md") if p.is_file())
-    except Exception:
-        return 0
+        st = os.stat(sp.state / "tasks" / "tasks.json")
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
 
 
 def _current_task_id(sp: SessionPaths, role: str) -> str:
+    indexed = current_task_id(sp.session_root, role)
+    if indexed is not None:
+        return indexed
     try:
         for task in list_tasks(sp.session_root):
             if str(task.get("owner", "")).strip() != role:
@@ -406,16 +493,20 @@ def read_recent_role_memory(sp: SessionPaths, role: str) -> str:
     Stored under sessions/<sid>/state/memory/<role>.md (append-only-ish).
     """
     path = _role_memory_path(sp, role)
+    # Records still buffered by this process must be visible to the next prompt.
+    _MEMORY_BUFFER.flush(path)
     try:
-        if not path.exists():
-            return ""
-        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
-        tail = lines[-ROLE_MEMORY_PROMPT_LINES:] if len(lines) > ROLE_MEMORY_PROMPT_LINES else lines
-        return "\n".join(tail).strip()
+        return _read_cached(path, _memory_tail, "")
     except Exception:
         return ""
 
 
+def _memory_tail(path: Path) -> str:
+    lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+    tail = lines[-ROLE_MEMORY_PROMPT_LINES:] if len(lines) > ROLE_MEMORY_PROMPT_LINES else lines
+    return "\n".join(tail).strip()
+
+
 def append_role_memory(
     sp: SessionPaths,
     *,
@@ -429,39 +520,89 @@ def append_role_memory(
     summary: str,
 ) -> None:
     """
-    Append a compact line-oriented memory record and keep the file bounded.
+    Queue a compact line-oriented memory record; written by _MEMORY_BUFFER.flush().
     """
-    path = _role_memory_path(sp, role)
-    mkdirp(path.parent)
-    ts = time.strftime("%Y-%m-%d %H:%M:%S")
+    ts = _now()
     tid = task_id.strip() or "-"
     it = intent.strip() or "-"
     one = (summary.strip().splitlines() or [""])[0].strip()
     if len(one) > 160:
         one = one[:160] + "..."
     rec = f"- {ts} session={session} mid={mid} task_id={tid} intent={it} status={status} rc={codex_rc} :: {one}\n"
+    _MEMORY_BUFFER.append(_role_memory_path(sp, role), rec.encode("utf-8"))
+
+
+class _MemoryBuffer:
+    """
+    Role-memory records pending in this process, written with one O_APPEND write per
+    file on flush(): before the next prompt reads the memory, when idle, at
+    `max_bytes`, and at exit.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024):
+        self.max_bytes = max_bytes
+        self._pending: Dict[Path, bytearray] = {}
+        self._size = 0
+
+    def append(self, path: Path, rec: bytes) -> None:
+        self._pending.setdefault(path, bytearray()).extend(rec)
+        self._size += len(rec)
+        if self._size >= self.max_bytes:
+            self.flush()
+
+    def flush(self, path: Optional[Path] = None) -> None:
+        for p in [path] if path is not None else list(self._pending):
+            buf = self._pending.pop(p, None)
+            if buf:
+                self._size -= len(buf)
+                _write_role_memory(p, bytes(buf))
+
+
+_MEMORY_BUFFER = _MemoryBuffer()
+
+
+def _write_role_memory(path: Path, data: bytes) -> None:
+    """
+    Append `data` to a role memory file and keep the file bounded.
+    """
     try:
-        with open(path, "a", encoding="utf-8") as f:
-            f.write(rec)
+        mkdirp(path.parent)
+        fd = os.open(str(path), os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
     except Exception:
         return
     try:
-        if path.stat().st_size <= ROLE_MEMORY_MAX_BYTES:
+        os.write(fd, data)
+        size = os.fstat(fd).st_size
+        if size <= ROLE_MEMORY_MAX_BYTES:
             return
-        # Trim to the last ~ROLE_MEMORY_PROMPT_LINES*2 lines when oversized.
-        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+        # Trim in place to the last ~ROLE_MEMORY_PROMPT_LINES*2 lines when oversized:
+        # find the cut with a reverse newline scan, shift the tail down, truncate.
         keep = max(ROLE_MEMORY_PROMPT_LINES * 2, 80)
-        tail = lines[-keep:] if len(lines) > keep else lines
-        path.write_text("\n".join(tail).strip() + "\n", encoding="utf-8")
+        with mmap.mmap(fd, size) as mm:
+            end = size - 1
+            for _ in range(keep):
+                end = mm.rfind(b"\n", 0, end)
+                if end < 0:
+                    return
+            cut = end + 1
+            mm.move(0, cut, size - cut)
+            mm.flush()
+        os.ftruncate(fd, size - cut)
     except Exception:
         return
+    finally:
+        os.close(fd)
 
 
-def log_heartbeat(sp: SessionPaths, session: str, role: str, poll_s: float) -> None:
+def log_heartbeat(
+    sp: SessionPaths, session: str, role: str, poll_s: float, *, use_global_lock: Optional[bool] = None
+) -> None:
     inbox_count = _count_md_files(sp.bus / "inbox" / role)
     outbox_count = _count_md_files(sp.bus / "outbox")
     cur_task = _current_task_id(sp, role) or "-"
-    global_lock = "1" if _use_global_lock() else "0"
+    if use_global_lock is None:
+        use_global_lock = _use_global_lock()
+    global_lock = "1" if use_global_lock else "0"
     LOG.info(
         "heartbeat session=%s role=%s pid=%s poll_s=%s inbox_count=%s outbox_count=%s current_task_id=%s global_lock=%s",
         session,
@@ -482,73 +623,157 @@ def parse_frontmatter(md: str) -> Tuple[Dict[str, object], str]:
     - key: value
     - acceptance: list with `  - "..."` lines
     """
-    lines = md.splitlines()
-    if len(lines) < 3 or lines[0].strip() != "---":
+    # One regex search for the closing `---`, one findall over the header; the body
+    # is sliced once, never split.
+    nl = md.find("\n")
+    if nl < 0 or md[:nl].strip() != "---":
+        return {}, md
+    close = _RE_FM_CLOSE.search(md, nl + 1)
+    if close is None:
+        return {}, md
+    rest = md[close.end() + 1 :]
+    if close.start() == nl + 1 and not rest:
         return {}, md
     fm: Dict[str, object] = {}
-    i = 1
     current_key = None
-    while i < len(lines):
-        line = lines[i]
-        if line.strip() == "---":
-            body = "\n".join(lines[i + 1 :]).lstrip("\n")
-            return fm, body
-        if line.startswith("  - ") and current_key:
-            val = line[4:].strip()
-            if val.startswith('"') and val.endswith('"'):
-                val = val[1:-1]
-            if isinstance(fm.get(current_key), list):
-                fm[current_key].append(val)
-            else:
-                fm[current_key] = [val]
-            i += 1
-            continue
-        m = re.match(r"^([A-Za-z0-9_\-]+):\s*(.*)$", line)
-        if m:
-            k = m.group(1)
-            v = m.group(2).strip()
-            current_key = k
+    # List of the current key, created by its first `  - ` item (replacing the scalar).
+    items: Optional[List[str]] = None
+    for item, k, v in _RE_FM_LINE.findall(md, nl + 1, close.start()):
+        if k:
+            v = v.strip()
             if v.startswith('"') and v.endswith('"'):
                 v = v[1:-1]
             fm[k] = v
-        i += 1
-    return {}, md
+            current_key = k
+            items = None
+        elif current_key:
+            item = item.strip()
+            if item.startswith('"') and item.endswith('"'):
+                item = item[1:-1]
+            if items is None:
+                items = fm[current_key] = []
+            items.append(item)
+    if rest.endswith("\n"):
+        rest = rest[:-1]
+    return fm, rest.lstrip("\n")
+
+
+def _cached_frontmatter(p: Path, st: Optional[os.stat_result] = None) -> Dict[str, object]:
+    """
+    parse_frontmatter(read_text(p))[0], memoized by (path, mtime_ns, size).
+    Callers must treat the returned dict as read-only.
+    """
+    if st is None:
+        st = p.stat()
+    key = (str(p), st.st_mtime_ns, st.st_size)
+    fm = _FM_CACHE.get(key)
+    if fm is not None:
+        _FM_CACHE.move_to_end(key)
+        return fm
+    fm, _ = parse_frontmatter(read_text(p))
+    _FM_CACHE[key] = fm
+    if len(_FM_CACHE) > _FM_CACHE_MAX:
+        _FM_CACHE.popitem(last=False)
+    return fm
+
+
+def _read_cached(path: Path, parser, default):
+    """
+    parser(path) memoized by (mtime_ns, size); `default` if the file is missing.
+    """
+    key = str(path)
+    try:
+        st = os.stat(key)
+    except OSError:
+        _STAT_CACHE.pop(key, None)
+        return default
+    hit = _STAT_CACHE.get(key)
+    if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+    value = parser(path)
+    _STAT_CACHE[key] = (st.st_mtime_ns, st.st_size, value)
+    return value
 
 
-def _read_codex_config_model() -> str:
-    cfg = Path.home() / ".codex" / "config.toml"
-    if not cfg.exists():
-        return ""
-    try:
-        text = cfg.read_text(encoding="utf-8")
-    except Exception:
-        return ""
-    m = re.search(r'^\s*model\s*=\s*"([^"]+)"\s*$', text, flags=re.M)
-    return m.group(1).strip() if m else ""
+_CODEX_CONFIG_HEAD_BYTES = 4096
 
 
-def _read_codex_config_model_provider() -> str:
-    cfg = Path.home() / ".codex" / "config.toml"
-    if not cfg.exists():
-        return ""
+def _scan_codex_config(raw: bytes) -> Dict[str, str]:
+    found: Dict[str, str] = {}
+    for m in _RE_CFG_MODEL.finditer(raw.decode("utf-8", "replace")):
+        found.setdefault(m.group(1), m.group(2).strip())
+    return found
+
+
+def _parse_codex_config(cfg: Path) -> Tuple[str, str]:
+    if tomllib is not None:
+        try:
+            data = tomllib.loads(cfg.read_bytes().decode("utf-8"))
+        except Exception:
+            data = None
+        if data is not None:
+            model, provider = data.get("model"), data.get("model_provider")
+            return (
+                model.strip() if isinstance(model, str) else "",
+                provider.strip() if isinstance(provider, str) else "",
+            )
+    # The keys sit near the top: parse whole lines of the first 4 KiB, and only read
+    # the rest of the file if `model` is not among them.
     try:
-        text = cfg.read_text(encoding="utf-8")
+        with cfg.open("rb") as f:
+            head = f.read(_CODEX_CONFIG_HEAD_BYTES)
+            if len(head) < _CODEX_CONFIG_HEAD_BYTES:
+                found = _scan_codex_config(head)
+            else:
+                found = _scan_codex_config(head[: head.rfind(b"\n") + 1])
+                if "model" not in found:
+                    found = _scan_codex_config(head + f.read())
     except Exception:
-        return ""
-    m = re.search(r'^\s*model_provider\s*=\s*"([^"]+)"\s*$', text, flags=re.M)
-    return m.group(1).strip() if m else ""
+        return "", ""
+    return found.get("model", ""), found.get("model_provider", "")
 
 
-def _read_codex_models_cache() -> List[Dict[str, object]]:
-    path = Path.home() / ".codex" / "models_cache.json"
-    if not path.exists():
-        return []
+def _load_codex_config() -> Tuple[str, str]:
+    """
+    (model, model_provider) from ~/.codex/config.toml.
+    """
+    return _read_cached(Path.home() / ".codex" / "config.toml", _parse_codex_config, ("", ""))
+
+
+def _parse_codex_models_cache(path: Path) -> Tuple[FrozenSet[str], str]:
+    """
+    (listed slugs, fallback slug) with the fallback chosen once per cache version:
+    the first DEFAULT_FALLBACK_MODELS entry listed, else the highest-priority
+    codex-ish slug (first wins on ties), else "".
+    """
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
+        data = _json_loads(path.read_bytes())
     except Exception:
-        return []
-    models = data.get("models")
-    return models if isinstance(models, list) else []
+        return frozenset(), ""
+    models = data.get("models") if isinstance(data, dict) else None
+    if not isinstance(models, list):
+        return frozenset(), ""
+    slugs = {str(m.get("slug", "")).strip(): m for m in models if isinstance(m, dict)}
+    for s in DEFAULT_FALLBACK_MODELS:
+        if s in slugs:
+            return frozenset(slugs), s
+    best = ""
+    best_pri = -10**9
+    for s, meta in slugs.items():
+        if "codex" not in s:
+            continue
+        try:
+            pri = int(meta.get("priority", 0))
+        except Exception:
+            pri = 0
+        if pri > best_pri:
+            best_pri = pri
+            best = s
+    return frozenset(slugs), best
+
+
+def _load_codex_models() -> Tuple[FrozenSet[str], str]:
+    return _read_cached(Path.home() / ".codex" / "models_cache.json", _parse_codex_models_cache, (frozenset(), ""))
 
 
 def choose_model(cli_model: str = "") -> str:
@@ -566,10 +791,8 @@ def choose_model(cli_model: str = "") -> str:
     if env_model:
         return env_model
 
-    cfg_model = _read_codex_config_model()
-    cfg_provider = _read_codex_config_model_provider()
-    cache = _read_codex_models_cache()
-    slugs = {str(m.get("slug", "")).strip(): m for m in cache if isinstance(m, dict)}
+    cfg_model, cfg_provider = _load_codex_config()
+    slugs, fallback = _load_codex_models()
 
     # If user configured a custom provider, allow unlisted models (often not in OpenAI model cache).
     # This enables setups like Azure deployments or OpenAI-compatible chat endpoints.
@@ -584,26 +807,9 @@ def choose_model(cli_model: str = "") -> str:
     if cfg_model and cfg_model in slugs:
         return cfg_model
 
-    # Prefer a stable codex model from cache.
-    for s in DEFAULT_FALLBACK_MODELS:
-        if s in slugs:
-            return s
-
-    # Otherwise pick the highest-priority listed codex-ish model.
-    best = ""
-    best_pri = -10**9
-    for s, meta in slugs.items():
-        if "codex" not in s:
-            continue
-        try:
-            pri = int(meta.get("priority", 0))
-        except Exception:
-            pri = 0
-        if pri > best_pri:
-            best_pri = pri
-            best = s
-    if best:
-        return best
+    # Prefer a stable codex model from cache, else the highest-priority listed codex-ish one.
+    if fallback:
+        return fallback
 
     # Last resort: return config even if invalid; codex will error clearly.
     return cfg_model
@@ -613,18 +819,61 @@ def inbox_dir(sp: SessionPaths, role: str) -> Path:
     return sp.bus / "inbox" / role
 
 
-def message_files(sp: SessionPaths, role: str) -> List[Path]:
+_MESSAGE_SCAN_HEAD = 8
+
+
+def message_files(sp: SessionPaths, role: str) -> Iterator[Path]:
+    """
+    Inbox messages in name (= enqueue) order, produced lazily: callers usually stop
+    at the first processable one, so only the smallest few names are selected up front.
+    """
     d = inbox_dir(sp, role)
-    if not d.is_dir():
-        return []
-    return sorted([p for p in d.glob("*.md") if p.is_file()], key=lambda p: p.name)
+    if _WATCHER is not None and _WATCHER.watching(d):
+        # Event-driven cache: already sorted, rescanned only after a change.
+        for n in _WATCHER.md_names(d):
+            yield d / n
+        return
+    try:
+        with os.scandir(d) as it:
+            names = [e.name for e in it if e.name.endswith(".md") and e.is_file(follow_symlinks=False)]
+    except OSError:
+        return
+    head = heapq.nsmallest(_MESSAGE_SCAN_HEAD, names)
+    for n in head:
+        yield d / n
+    if len(names) > len(head):
+        names.sort()
+        for n in names[len(head) :]:
+            yield d / n
 
 
-def message_id(msg_path: Path, front: Dict[str, object]) -> str:
-    mid = str(front.get("id", "")).strip()
-    if mid:
-        return mid
-    return msg_path.stem
+@dataclass
+class FrontFields:
+    mid: str
+    thread: str
+    request_from: str
+    request_to: str
+    request_intent: str
+    task_id: str
+
+
+def front_fields(msg_path: Path, front: Dict[str, object], session: str) -> FrontFields:
+    """
+    The routing fields process_one needs, extracted in one pass over `front`.
+    """
+    out = []
+    for key in ("id", "thread", "from", "to", "intent", "task_id"):
+        v = front.get(key)
+        out.append("" if v is None else str(v).strip())
+    mid, thread, request_from, request_to, request_intent, task_id = out
+    return FrontFields(
+        mid=mid or msg_path.stem,
+        thread=thread or session,
+        request_from=request_from,
+        request_to=request_to,
+        request_intent=request_intent,
+        task_id=task_id,
+    )
 
 
 def done_sentinel(sp: SessionPaths, mid: str, role: str) -> Path:
@@ -635,29 +884,78 @@ def processing_lock(sp: SessionPaths, mid: str, role: str) -> Path:
     return sp.state / "processing" / f"{mid}.{role}.lockdir"
 
 
+def global_lock_dir(sp: SessionPaths) -> Path:
+    return sp.artifacts / "locks" / "autopilot.global.lockdir"
+
+
 def archive_path(sp: SessionPaths, role: str, msg_path: Path) -> Path:
     return sp.state / "archive" / role / msg_path.name
 
 
+def archive_message(sp: SessionPaths, role: str, msg_path: Path) -> None:
+    dst = archive_path(sp, role, msg_path)
+    try:
+        os.replace(msg_path, dst)
+    except FileNotFoundError:
+        # ensure_session_dirs creates archive/<role>; only recreate it if it was removed.
+        mkdirp(dst.parent)
+        os.replace(msg_path, dst)
+
+
 def deadletter_path(sp: SessionPaths, role: str, msg_path: Path) -> Path:
     return sp.bus / "deadletter" / role / msg_path.name
 
 
 def load_json(path: Path) -> Dict:
-    if not path.exists():
-        return {}
+    # No exists() pre-check: a missing file is just the common error case.
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        with open(path, "rb") as f:
+            return _json_loads(f.read())
     except Exception:
         return {}
 
 
 def save_json(path: Path, data: Dict) -> None:
-    mkdirp(path.parent)
-    path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+    # Compact and atomic: readers never see a truncated file.
+    atomic_write_bytes(path, json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+
+def _load_retries(path: Path) -> Dict:
+    retries = _RETRIES_CACHE.get(path)
+    if retries is None:
+        retries = _RETRIES_CACHE[path] = load_json(path)
+    return retries
+
+
+def _drop_retries(path: Path, *, unlink: bool = False) -> None:
+    retries = _RETRIES_CACHE.pop(path, None)
+    if unlink and (retries is None or retries.get("count")):
+        try:
+            path.unlink()
+        except Exception:
+            pass
+
+
+_PID_ALIVE_TTL_S = 1.0
+# pid -> (expires_at monotonic, alive); polls of a lock held by another daemon reuse it.
+_PID_ALIVE_CACHE: Dict[int, Tuple[float, bool]] = {}
 
 
 def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    now = time.monotonic()
+    hit = _PID_ALIVE_CACHE.get(pid)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    alive = _probe_pid(pid)
+    if len(_PID_ALIVE_CACHE) > 256:
+        _PID_ALIVE_CACHE.clear()
+    _PID_ALIVE_CACHE[pid] = (now + _PID_ALIVE_TTL_S, alive)
+    return alive
+
+
+def _probe_pid(pid: int) -> bool:
     try:
         os.kill(pid, 0)
         return True
@@ -670,19 +968,31 @@ def _pid_alive(pid: int) -> bool:
         return False
 
 
+def _pid_snapshot() -> Optional[FrozenSet[int]]:
+    """
+    All live pids from one /proc listing (Linux). None where that is unavailable;
+    callers then fall back to per-pid _pid_alive().
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return frozenset(int(n) for n in os.listdir("/proc") if n.isdigit())
+    except OSError:
+        return None
+
+
 def _cleanup_lockdir(lock_dir: Path) -> None:
-    if not lock_dir.exists():
-        return
-    pid_file = lock_dir / "pid"
+    # `pid` is the only file a lock dir holds: unlink it by name (a symlink or other
+    # odd entry is removed itself, never followed), then rmdir.
     try:
-        st = os.lstat(pid_file)
-        if stat.S_ISREG(st.st_mode):
-            pid_file.unlink(missing_ok=True)
-    except Exception:
+        os.unlink(lock_dir / "pid")
+    except OSError:
         pass
     try:
         os.rmdir(lock_dir)
         return
+    except FileNotFoundError:
+        return
     except Exception:
         pass
     # Avoid traversing potentially corrupt lock dirs; quarantine with atomic rename.
@@ -706,23 +1016,39 @@ def _cleanup_lockdir(lock_dir: Path) -> None:
         pass
 
 
-def _read_lock_pid(lock_dir: Path) -> int:
-    pid_file = lock_dir / "pid"
-    try:
-        st = os.lstat(pid_file)
-        if not stat.S_ISREG(st.st_mode):
-            return 0
-        raw = pid_file.read_text(encoding="utf-8").strip()
-        return int(raw) if raw else 0
-    except Exception:
-        return 0
-
+def _inspect_lockdir(lock_dir: Path) -> Optional[Tuple[int, float]]:
+    """
+    (pid, age_s) of a lock dir, or None if it does not exist.
 
-def _lock_age_seconds(lock_dir: Path) -> float:
+    One open + fstat + read on `pid` (written right after mkdir, so its mtime is
+    the lock's age); the dir itself is only stat'ed when `pid` is missing/unusable.
+    pid is 0 when unreadable or not a regular file.
+    """
+    flags = os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_NONBLOCK", 0)
     try:
-        return max(0.0, time.time() - lock_dir.stat().st_mtime)
-    except Exception:
-        return float("inf")
+        fd = os.open(str(lock_dir / "pid"), flags)
+    except OSError:
+        try:
+            st = os.stat(lock_dir, follow_symlinks=False)
+        except FileNotFoundError:
+            return None
+        except OSError:
+            return 0, float("inf")
+        return 0, max(0.0, time.time() - st.st_mtime)
+    try:
+        st = os.fstat(fd)
+        age_s = max(0.0, time.time() - st.st_mtime)
+        if not stat.S_ISREG(st.st_mode):
+            return 0, age_s
+        raw = os.read(fd, 64).strip()
+        try:
+            return (int(raw) if raw else 0), age_s
+        except ValueError:
+            return 0, age_s
+    except OSError:
+        return 0, float("inf")
+    finally:
+        os.close(fd)
 
 
 def _is_placeholder_text(s: str) -> bool:
@@ -742,65 +1068,61 @@ def _is_placeholder_text(s: str) -> bool:
     return t in placeholders
 
 
-def _extract_task_objective(task_md: str) -> str:
-    lines = task_md.splitlines()
+def _parse_task_md(task_md: str) -> Tuple[str, List[str]]:
+    """
+    Single pass over shared/task.md returning (objective, acceptance lines).
 
-    # 1) Prefer explicit objective fields.
-    for raw in lines:
-        s = raw.strip()
-        m = re.match(r"^[-*]?\s*(目标|objective)[^:：]*[:：]\s*(.+)$", s, flags=re.I)
-        if m:
-            v = m.group(2).strip()
-            if v and not _is_placeholder_text(v):
-                return v
-
-    # 2) Fallback to # Task section first meaningful line.
-    in_task = False
-    for raw in lines:
+    Objective: first explicit `目标/objective:` field, else the first meaningful
+    line of the `# Task` section. Acceptance: list items under `## Acceptance`.
+    """
+    explicit = ""
+    fallback = ""
+    acceptance: List[str] = []
+    # Section states: 0 = not reached, 1 = inside, 2 = finished.
+    task_sec = 0
+    acc_sec = 0
+    for raw in task_md.splitlines():
         s = raw.strip()
-        if re.match(r"^#\s*task\b", s, flags=re.I):
-            in_task = True
-            continue
-        if in_task and re.match(r"^##\s+", s):
-            break
-        if not in_task:
-            continue
         if not s:
             continue
-        if s.startswith("|"):
-            continue
-        if re.match(r"^[-*]\s+[^:：]+[:：]\s*$", s):
-            # Template placeholder lines like "- 目标（Objective）："
-            continue
-        if _is_placeholder_text(s):
-            continue
-        return s
-    return ""
-
-
-def _extract_acceptance_lines(task_md: str) -> List[str]:
-    lines = task_md.splitlines()
-    in_sec = False
-    out: List[str] = []
-    for raw in lines:
-        s = raw.strip()
-        if re.match(r"^##\s*(acceptance|验收标准)\b", s, flags=re.I):
-            in_sec = True
-            continue
-        if in_sec and re.match(r"^##\s+", s):
-            break
-        if not in_sec:
-            continue
-        m = re.match(r"^[-*]\s+(.+)$", s)
-        if not m:
-            m = re.match(r"^\d+[.)]\s+(.+)$", s)
-        if not m:
-            continue
-        v = m.group(1).strip()
-        if not v or _is_placeholder_text(v):
-            continue
-        out.append(v)
-    return out
+        head = s[0]
+        if not explicit and head in "-*目oO":
+            m = _RE_OBJECTIVE.match(s)
+            if m:
+                v = m.group(2).strip()
+                if v and not _is_placeholder_text(v):
+                    explicit = v
+                    if acc_sec == 2:
+                        break
+        acc_hdr = False
+        if head == "#":
+            if task_sec < 2 and _RE_TASK_HDR.match(s):
+                task_sec = 1
+            elif task_sec == 1 and _RE_H2.match(s):
+                task_sec = 2
+            acc_hdr = acc_sec < 2 and _RE_ACCEPT_HDR.match(s) is not None
+        if task_sec == 1 and not fallback and not explicit:
+            if not (
+                s.startswith("|")
+                or _RE_TASK_HDR.match(s)
+                or _RE_LABEL_ITEM.match(s)
+                or _is_placeholder_text(s)
+            ):
+                fallback = s
+        if acc_hdr:
+            acc_sec = 1
+        elif acc_sec == 1:
+            if head == "#" and _RE_H2.match(s):
+                acc_sec = 2
+                if explicit:
+                    break
+            else:
+                m = _RE_LIST_ITEM.match(s) or _RE_NUM_ITEM.match(s)
+                if m:
+                    v = m.group(1).strip()
+                    if v and not _is_placeholder_text(v):
+                        acceptance.append(v)
+    return explicit or fallback, acceptance
 
 
 def _infer_work_type(task_text: str) -> str:
@@ -838,6 +1160,103 @@ def _format_task_message(task: Dict[str, object]) -> str:
     return "\n".join(lines)
 
 
+def _append_receipt_index(sp: SessionPaths, task_id: str, rec: Dict[str, str]) -> None:
+    """
+    Append one receipt record to state/receipt_index/<task_id>.jsonl (best-effort).
+    Only indexes created with their task are appended to: an index must hold every receipt.
+    """
+    path = receipt_index_path(sp.session_root, task_id)
+    if path is None:
+        return
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | getattr(os, "O_CLOEXEC", 0))
+    except OSError:
+        return
+    try:
+        os.write(fd, (json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8"))
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _indexed_receipts(sp: SessionPaths, task_id: str, max_receipts: int) -> Optional[List[Dict[str, str]]]:
+    """
+    Newest-first receipts for `task_id` from the receipt index; None if there is no index.
+    The index is complete for its task, so no outbox scan is needed. Files are not stat-ed:
+    entries are references, and readers of `file` must tolerate it having been removed.
+    """
+    path = receipt_index_path(sp.session_root, task_id)
+    if path is None:
+        return None
+    try:
+        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError:
+        return None
+    out: List[Dict[str, str]] = []
+    seen = set()
+    for line in reversed(lines):
+        if len(out) >= max_receipts:
+            break
+        try:
+            rec = json.loads(line)
+        except Exception:
+            continue
+        if not isinstance(rec, dict):
+            continue
+        f = str(rec.get("file", ""))
+        if f in seen:
+            continue
+        seen.add(f)
+        out.append({k: str(rec.get(k, "")) for k in ("receipt_id", "role", "status", "codex_rc", "finished_at", "file")})
+    return out
+
+
+def _scanned_receipts(sp: SessionPaths, task_id: str, max_receipts: int) -> List[Dict[str, str]]:
+    """
+    Newest-first (by mtime) outbox receipts whose frontmatter task_id is `task_id`.
+    """
+    receipts: List[Dict[str, str]] = []
+    outbox = sp.bus / "outbox"
+    entries: List[Tuple[int, str, os.stat_result]] = []
+    try:
+        with os.scandir(outbox) as it:
+            for e in it:
+                if not e.name.endswith(".md") or not e.is_file(follow_symlinks=False):
+                    continue
+                try:
+                    st = e.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, e.path, st))
+    except OSError:
+        pass
+    entries.sort(key=lambda x: (x[0], x[1]), reverse=True)
+    for _, path_s, st in entries:
+        if len(receipts) >= max_receipts:
+            break
+        p = Path(path_s)
+        try:
+            fm = _cached_frontmatter(p, st)
+        except Exception:
+            continue
+        rid = str(fm.get("id", "")).strip() or p.stem
+        rtid = str(fm.get("task_id", "")).strip()
+        if rtid != task_id:
+            continue
+        receipts.append(
+            {
+                "receipt_id": rid,
+                "role": str(fm.get("role", "")).strip(),
+                "status": str(fm.get("status", "")).strip(),
+                "codex_rc": str(fm.get("codex_rc", "")).strip(),
+                "finished_at": str(fm.get("finished_at", "")).strip(),
+                "file": str(p),
+            }
+        )
+    return receipts
+
+
 def _format_task_context(sp: SessionPaths, task_id: str, *, max_receipts: int = 3) -> str:
     tid = str(task_id or "").strip()
     if not tid:
@@ -859,32 +1278,10 @@ def _format_task_context(sp: SessionPaths, task_id: str, *, max_receipts: int =
     }
 
     # Attach minimal recent receipts for this task id (improves cross-message coherence).
-    receipts: List[Dict[str, str]] = []
-    outbox = sp.bus / "outbox"
-    if outbox.is_dir():
-        files = sorted([p for p in outbox.glob("*.md") if p.is_file()], key=lambda p: p.stat().st_mtime, reverse=True)
-        for p in files:
-            if len(receipts) >= max_receipts:
-                break
-            try:
-                raw = read_text(p)
-            except Exception:
-                continue
-            fm, _ = parse_frontmatter(raw)
-            rid = str(fm.get("id", "")).strip() or p.stem
-            rtid = str(fm.get("task_id", "")).strip()
-            if rtid != tid:
-                continue
-            receipts.append(
-                {
-                    "receipt_id": rid,
-                    "role": str(fm.get("role", "")).strip(),
-                    "status": str(fm.get("status", "")).strip(),
-                    "codex_rc": str(fm.get("codex_rc", "")).strip(),
-                    "finished_at": str(fm.get("finished_at", "")).strip(),
-                    "file": str(p),
-                }
-            )
+    receipts = _indexed_receipts(sp, tid, max_receipts)
+    if receipts is None:
+        # Task created before receipt indexes existed: scan the outbox.
+        receipts = _scanned_receipts(sp, tid, max_receipts)
 
     parts = [
         "Task context (task-board + recent receipts):",
@@ -915,43 +1312,44 @@ def dispatch_ready_tasks(
 ) -> List[str]:
     sent: List[str] = []
     role_set = set(roles)
+    staged: List[Tuple[Dict[str, str], Dict[str, object]]] = []
     for task in list_dispatchable_tasks(sp.session_root, owner=owner):
-        if DISPATCH_MAX_PER_SCAN > 0 and len(sent) >= DISPATCH_MAX_PER_SCAN:
+        if DISPATCH_MAX_PER_SCAN > 0 and len(staged) >= DISPATCH_MAX_PER_SCAN:
             break
         tid = str(task.get("id", "")).strip()
         to_role = str(task.get("owner", "")).strip()
         if not tid or not to_role or to_role not in role_set:
             continue
-        mid = new_id("")
-        msg_path = enqueue_bus_message(
-            sp,
-            to_role=to_role,
-            from_role=from_role,
-            intent=str(task.get("intent", "")).strip() or "implement",
-            thread=session,
-            risk=str(task.get("risk", "")).strip() or "low",
-            body=_format_task_message(task),
-            mid=mid,
-            task_id=tid,
-            acceptance=_normalize_list(task.get("acceptance")),
-        )
-        ok, _, reason = set_dispatch(
-            sp.session_root,
-            task_id=tid,
-            from_role=from_role,
-            to_role=to_role,
-            intent=str(task.get("intent", "")).strip() or "implement",
-            message_id=mid,
-        )
+        intent = str(task.get("intent", "")).strip() or "implement"
+        entry = {"task_id": tid, "from_role": from_role, "to_role": to_role, "intent": intent, "message_id": new_id("")}
+        staged.append((entry, task))
+    if not staged:
+        return sent
+    # One board lock + write for the whole scan instead of one per task. The dispatch is
+    # recorded before its message is published, so a rejected entry is never visible to a
+    # worker and a failed board update leaves nothing behind to be dispatched twice.
+    results = set_dispatch_many(sp.session_root, [e for e, _ in staged])
+    for (entry, task), (ok, _, _reason) in zip(staged, results):
         if not ok:
-            try:
-                msg_path.unlink(missing_ok=True)
-            except Exception:
-                pass
-            if reason in ("already_dispatched", "already_dispatched_same"):
-                continue
             continue
-        sent.append(f"{tid}->{to_role}({mid})")
+        try:
+            enqueue_bus_message(
+                sp,
+                to_role=entry["to_role"],
+                from_role=from_role,
+                intent=entry["intent"],
+                thread=session,
+                risk=str(task.get("risk", "")).strip() or "low",
+                body=_format_task_message(task),
+                mid=entry["message_id"],
+                task_id=entry["task_id"],
+                acceptance=_normalize_list(task.get("acceptance")),
+            )
+        except OSError as e:
+            # The recorded dispatch goes stale and is redispatched after TASK_BOARD_DISPATCH_STALE_SECONDS.
+            LOG.warning("dispatch_publish_failed task_id=%s message_id=%s err=%s", entry["task_id"], entry["message_id"], e)
+            continue
+        sent.append(f"{entry['task_id']}->{entry['to_role']}({entry['message_id']})")
     return sent
 
 
@@ -963,12 +1361,11 @@ def run_lead_bootstrap(
     source_message_id: str,
 ) -> str:
     task_md = sp.shared / "task.md"
-    if not task_md.exists():
+    if not os.path.exists(task_md):
         return "Bootstrap blocked: shared/task.md not found."
 
     task_text = read_text(task_md).strip()
-    objective = _extract_task_objective(task_text)
-    acceptance = _extract_acceptance_lines(task_text)
+    objective, acceptance = _parse_task_md(task_text)
     if not objective:
         return "Bootstrap blocked: shared/task.md has no actionable objective."
     if not acceptance:
@@ -1043,57 +1440,112 @@ def run_lead_bootstrap(
     return "\n".join(lines)
 
 
-def build_role_prompt(sp: SessionPaths, session: str, role: str, msg_path: Path, msg_body: str, *, task_id: str = "") -> str:
-    role_prompt_path = sp.roles / role / "prompt.md"
-    base = read_text(role_prompt_path).strip() if role_prompt_path.exists() else f"You are {role}."
-    mem = read_recent_role_memory(sp, role=role)
-    mem_block = ""
-    if mem:
-        mem_block = f"""
-
-Recent role memory (tail; do not treat as authoritative requirements):
-```md
-{mem}
-```
-"""
-    task_block = ""
-    if task_id.strip():
-        task_ctx = _format_task_context(sp, task_id.strip(), max_receipts=3)
-        if task_ctx:
-            task_block = f"""
-
-{task_ctx}
-"""
-
-    extra = f"""
-
+_PROMPT_HEAD = """
 You are running under Autopilot (message bus mode) on macOS.
 
-Session root (shared truth): {sp.session_root}
-Message file to process: {msg_path}
+Session root (shared truth): """
+_PROMPT_MSG_FILE = "\nMessage file to process: "
+_PROMPT_RULES_A = """
 
 Rules:
 - Do not ask the human for input.
 - If you need clarification or want to hand off work, either:
   - emit a directive in your final message (router will execute it):
-    ::bus-send{{to="lead" intent="question" risk="low" message="..." }}
+    ::bus-send{to="lead" intent="question" risk="low" message="..." }
   - or (fallback) send a bus message manually:
-    ./scripts/bus-send.sh --session {session} --from {role} --to <role> --intent question --message "<...>"
+    ./scripts/bus-send.sh --session """
+_PROMPT_RULES_B = """ --to <role> --intent question --message "<...>"
 - Do not process messages outside your role.
 - Prefer writing results to your role outbox/worklog. Only write shared files if your role is the owner per prompt.
  - If you want Reviewer/Tester to act next, include ::bus-send directives (router will deliver them).
-{mem_block}
-{task_block}
+"""
+_PROMPT_MEM_OPEN = """
+
+Recent role memory (tail; do not treat as authoritative requirements):
+```md
+"""
+_PROMPT_TASK = """
 
 Task:
 Read the message file content below and execute it end-to-end (code changes + verification + writeback).
 
 Message content:
 ```md
-{msg_body.strip()}
-```
 """
-    return base + "\n" + extra.strip() + "\n"
+
+
+def _read_file_bytes(path: Path) -> Optional[bytes]:
+    """
+    Whole file in one buffer sized from fstat (None if missing/unreadable).
+    """
+    try:
+        fd = os.open(str(path), os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+    except OSError:
+        return None
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size + 1)
+        if len(data) <= size:
+            return data
+        # Grew since fstat: drain the rest.
+        parts = [data]
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                return b"".join(parts)
+            parts.append(chunk)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def _read_stripped(path: Path) -> str:
+    return read_text(path).strip()
+
+
+# (session_root, session, role) -> (base, text before msg_path, text after msg_path).
+_PROMPT_FRAMES: Dict[Tuple[str, str, str], Tuple[str, str, str]] = {}
+
+
+def _prompt_frame(sp: SessionPaths, session: str, role: str, base: str) -> Tuple[str, str]:
+    """
+    The per-role constant parts around the message path, joined once per prompt.md version.
+    """
+    key = (str(sp.session_root), session, role)
+    frame = _PROMPT_FRAMES.get(key)
+    if frame is None or frame[0] is not base:
+        head = "".join((base, _PROMPT_HEAD, key[0], _PROMPT_MSG_FILE))
+        rules = "".join((_PROMPT_RULES_A, session, " --from ", role, _PROMPT_RULES_B))
+        frame = _PROMPT_FRAMES[key] = (base, head, rules)
+    return frame[1], frame[2]
+
+
+def build_role_prompt(sp: SessionPaths, session: str, role: str, msg_path: Path, msg_body: str, *, task_id: str = "") -> str:
+    role_prompt_path = sp.roles / role / "prompt.md"
+    # Prompt and memory tail are re-read only when their file stat changes.
+    base = _read_cached(role_prompt_path, _read_stripped, None)
+    if base is None:
+        base = _default_role_base(role)
+    head, rules = _prompt_frame(sp, session, role, base)
+    mem = read_recent_role_memory(sp, role=role)
+    task_ctx = _format_task_context(sp, task_id.strip(), max_receipts=3) if task_id.strip() else ""
+    parts = [head, str(msg_path), rules]
+    if mem:
+        parts += (_PROMPT_MEM_OPEN, mem, "\n```\n")
+    parts.append("\n")
+    if task_ctx:
+        parts += ("\n\n", task_ctx, "\n")
+    parts += (_PROMPT_TASK, msg_body.strip(), "\n```\n")
+    return "".join(parts)
+
+
+_DEFAULT_ROLE_BASES: Dict[str, str] = {}
+
+
+def _default_role_base(role: str) -> str:
+    # Interned per role so _prompt_frame's identity check keeps hitting.
+    return _DEFAULT_ROLE_BASES.setdefault(role, f"You are {role}.")
 
 
 def _utf8_safe_env() -> Tuple[Dict[str, str], List[str]]:
@@ -1105,6 +1557,9 @@ def _utf8_safe_env() -> Tuple[Dict[str, str], List[str]]:
     env: Dict[str, str] = {}
     dropped: List[str] = []
     for k, v in os.environ.items():
+        if k.isascii() and v.isascii():
+            env[k] = v
+            continue
         try:
             k.encode("utf-8")
             v.encode("utf-8")
@@ -1115,6 +1570,26 @@ def _utf8_safe_env() -> Tuple[Dict[str, str], List[str]]:
     return env, dropped
 
 
+_SAFE_ENV: Optional[Dict[str, str]] = None
+
+
+def _codex_base_env() -> Dict[str, str]:
+    """
+    _utf8_safe_env() computed once per process (the daemon never mutates os.environ).
+    Callers must copy before modifying.
+    """
+    global _SAFE_ENV
+    if _SAFE_ENV is None:
+        env, dropped = _utf8_safe_env()
+        if dropped:
+            LOG.warning(
+                "dropped_non_utf8_env_vars vars=%s",
+                ",".join(sorted(dropped)),
+            )
+        _SAFE_ENV = env
+    return _SAFE_ENV
+
+
 def _git_changed_paths(repo_dir: Path) -> List[str]:
     """
     Return a stable list of paths that are changed/untracked in the given git worktree.
@@ -1122,28 +1597,37 @@ def _git_changed_paths(repo_dir: Path) -> List[str]:
     """
     try:
         p = subprocess.run(
-            ["git", "-C", str(repo_dir), "status", "--porcelain=v1"],
+            # Read-only probe: don't take index.lock to refresh stat info, which would
+            # contend with the role's own git commands in the same worktree. The untracked
+            # cache lets git skip re-reading directories whose mtime did not change.
+            [
+                "git",
+                "--no-optional-locks",
+                "-c",
+                "core.untrackedCache=true",
+                "-C",
+                str(repo_dir),
+                "status",
+                "--porcelain=v1",
+            ],
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
+            stderr=subprocess.DEVNULL,
             check=False,
             timeout=10,
         )
         if p.returncode != 0:
             return []
+        # Bytes mode: the XY status columns are skipped, so only path slices get decoded.
         out: List[str] = []
         for ln in p.stdout.splitlines():
-            ln = ln.rstrip("\n")
-            if not ln:
-                continue
             # Format: XY<space>path (or "R  old -> new").
             if len(ln) < 4:
                 continue
             rest = ln[3:].strip()
-            if " -> " in rest:
-                rest = rest.split(" -> ", 1)[1].strip()
+            if b" -> " in rest:
+                rest = rest.split(b" -> ", 1)[1].strip()
             if rest:
-                out.append(rest)
+                out.append(rest.decode("utf-8", "surrogateescape"))
         return sorted(set(out))
     except Exception:
         return []
@@ -1164,13 +1648,12 @@ def _enforce_role_boundary(role: str, *, baseline: List[str], after: List[str])
     if _role_allows_repo_writes(role):
         return True, "boundary_ok(builder)"
 
-    before_set = set(baseline or [])
-    after_set = set(after or [])
-    new_paths = sorted(after_set - before_set)
+    new_paths = set(after or []).difference(baseline or [])
     if not new_paths:
         return True, "boundary_ok(no_new_repo_changes)"
 
-    msg = f"role_boundary_violation role={role} new_paths={new_paths[:50]}"
+    # Only the 50 smallest paths are reported: bounded selection, no full sort.
+    msg = f"role_boundary_violation role={role} new_paths={heapq.nsmallest(50, new_paths)}"
     if len(new_paths) > 50:
         msg += f" (+{len(new_paths) - 50} more)"
 
@@ -1185,17 +1668,17 @@ class RoleBoundaryError(RuntimeError):
     pass
 
 
-def codex_exec(role_cwd: Path, prompt: str, out_last: Path, *, model: str, add_dirs: List[Path]) -> int:
-    mkdirp(out_last.parent)
-    env, dropped = _utf8_safe_env()
-    if dropped:
-        LOG.warning(
-            "dropped_non_utf8_env_vars vars=%s",
-            ",".join(sorted(dropped)),
-        )
+def codex_exec(
+    role_cwd: Path, prompt: str, out_last: Path, *, model: str, add_dirs: List[Path]
+) -> Tuple[int, Optional[bytes]]:
+    """
+    Run `codex exec` and return (rc, last message bytes or None if none was captured).
+    """
+    global _LAST_MSG_PIPE_OK
+    env = dict(_codex_base_env())
     env["PWD"] = str(role_cwd)
     cmd = [
-        "codex",
+        _codex_bin(),
         "-a",
         "never",
         "exec",
@@ -1206,24 +1689,120 @@ def codex_exec(role_cwd: Path, prompt: str, out_last: Path, *, model: str, add_d
     ]
     for d in add_dirs:
         cmd.extend(["--add-dir", str(d)])
-    cmd += [
-        "--cd",
-        str(role_cwd),
-        "--output-last-message",
-        str(out_last),
-        "-",
-    ]
-    p = subprocess.run(cmd, input=prompt, text=True, env=env)
+    cmd += ["--cd", str(role_cwd), "--output-last-message"]
+    if LAST_MSG_PIPE and _LAST_MSG_PIPE_OK is not False:
+        rc, data = _codex_run_pipe(cmd, prompt, env)
+        if data:
+            _LAST_MSG_PIPE_OK = True
+            return rc, data
+        if _LAST_MSG_PIPE_OK:
+            # The pipe already worked for this codex: the last message really was empty.
+            return rc, None
+        # Nothing has ever come through the pipe (path rejected or ignored, or this run had no
+        # final message): later messages use the file. Never rerun codex for this one.
+        _LAST_MSG_PIPE_OK = False
+        LOG.warning("last_msg_pipe_unconfirmed rc=%s using --output-last-message file from now on", rc)
+        return rc, None
+    mkdirp(out_last.parent)
+    rc = _codex_run(cmd + [str(out_last), "-"], prompt, env)
+    return rc, _read_file_bytes(out_last)
+
+
+# None until a last message has come through the pipe (True) or never did (False).
+_LAST_MSG_PIPE_OK: Optional[bool] = None
+
+
+def _codex_run(cmd: List[str], prompt: str, env: Dict[str, str], pass_fds: Tuple[int, ...] = ()) -> int:
+    global _CODEX_BIN
+    try:
+        p = subprocess.run(cmd, input=prompt.encode("utf-8"), env=env, pass_fds=pass_fds)
+    except FileNotFoundError:
+        # Binary moved (e.g. upgraded): re-resolve on the next call.
+        _CODEX_BIN = None
+        raise
     return p.returncode
 
 
+def _codex_run_pipe(cmd: List[str], prompt: str, env: Dict[str, str]) -> Tuple[int, bytes]:
+    """
+    Run codex with `--output-last-message /dev/fd/N` and return (rc, bytes read from the pipe).
+    """
+    r_fd, w_fd = os.pipe()
+    chunks: List[bytes] = []
+    done = threading.Event()
+    reader = threading.Thread(target=_drain_pipe, args=(r_fd, chunks, done), daemon=True)
+    try:
+        try:
+            reader.start()
+        except BaseException:
+            os.close(r_fd)
+            raise
+        rc = _codex_run(cmd + [f"/dev/fd/{w_fd}", "-"], prompt, env, pass_fds=(w_fd,))
+    finally:
+        os.close(w_fd)
+        done.set()
+        reader.join(timeout=5.0)
+    return rc, b"".join(list(chunks))
+
+
+def _drain_pipe(fd: int, chunks: List[bytes], done: threading.Event) -> None:
+    """
+    Read `fd` until EOF, or until `done` is set and nothing is left to read
+    (tools started by codex may inherit the write end and keep it open). Closes `fd`.
+    """
+    try:
+        while True:
+            ready, _, _ = select.select([fd], [], [], 0.1)
+            if not ready:
+                if done.is_set():
+                    return
+                continue
+            buf = os.read(fd, 65536)
+            if not buf:
+                return
+            chunks.append(buf)
+    except OSError:
+        return
+    finally:
+        os.close(fd)
+
+
+_CODEX_BIN: Optional[str] = None
+
+
+def _codex_bin() -> str:
+    """
+    `codex` resolved on PATH once per process (plain name if not found, so exec errors stay the same).
+    """
+    global _CODEX_BIN
+    if _CODEX_BIN is None:
+        _CODEX_BIN = shutil.which("codex", path=_codex_base_env().get("PATH")) or "codex"
+    return _CODEX_BIN
+
+
+_RECEIPT_TMPL = (
+    "---\n"
+    "id: {id}\n"
+    "role: {role}\n"
+    'thread: "{thread}"\n'
+    'request_from: "{request_from}"\n'
+    'request_to: "{request_to}"\n'
+    'request_intent: "{request_intent}"\n'
+    "{task_line}"
+    "status: {status}\n"
+    "codex_rc: {codex_rc}\n"
+    'finished_at: "{ts}"\n'
+    "---\n\n"
+)
+
+
 def write_receipt(
     sp: SessionPaths,
     mid: str,
     role: str,
     status: str,
     codex_rc: int,
-    last_msg: str,
+    last_msg: Union[str, bytes],
     *,
     thread: str,
     request_from: str,
@@ -1232,31 +1811,36 @@ def write_receipt(
     task_id: str = "",
 ) -> None:
     out = sp.bus / "outbox" / f"{mid}.{role}.md"
-    ts = time.strftime("%Y-%m-%d %H:%M:%S")
-    header = [
-        "---",
-        f"id: {mid}",
-        f"role: {role}",
-        f'thread: "{thread}"',
-        f'request_from: "{request_from}"',
-        f'request_to: "{request_to}"',
-        f'request_intent: "{request_intent}"',
-    ]
-    if task_id.strip():
-        header.append(f'task_id: "{task_id.strip()}"')
-    header.extend(
-        [
-            f"status: {status}",
-            f"codex_rc: {codex_rc}",
-            f'finished_at: "{ts}"',
-            "---",
-            "",
-            last_msg.strip(),
-            "",
-        ]
+    ts = _now()
+    head = _RECEIPT_TMPL.format(
+        id=mid,
+        role=role,
+        thread=thread,
+        request_from=request_from,
+        request_to=request_to,
+        request_intent=request_intent,
+        task_line=f'task_id: "{task_id.strip()}"\n' if task_id.strip() else "",
+        status=status,
+        codex_rc=codex_rc,
+        ts=ts,
     )
-    text = "\n".join(header)
-    out.write_text(text, encoding="utf-8")
+    # Codex transcripts arrive as raw bytes and are copied through without a re-encode.
+    body = last_msg.strip() if isinstance(last_msg, bytes) else last_msg.strip().encode("utf-8")
+    # Published atomically: the router may read the outbox at any moment.
+    atomic_write_bytes(out, b"".join((head.encode("utf-8"), body, b"\n")))
+    if task_id.strip():
+        _append_receipt_index(
+            sp,
+            task_id.strip(),
+            {
+                "receipt_id": mid,
+                "role": role,
+                "status": status,
+                "codex_rc": str(codex_rc),
+                "finished_at": ts,
+                "file": str(out),
+            },
+        )
 
 
 def process_one(
@@ -1268,15 +1852,23 @@ def process_one(
     *,
     model: str,
     runtime_state: Optional[Dict[str, str]] = None,
+    roles: Optional[List[str]] = None,
+    use_global_lock: Optional[bool] = None,
+    global_lock: Optional[Path] = None,
 ) -> bool:
+    """
+    `roles` is the caller's cached list_roles(sp); it is re-listed when omitted.
+    `use_global_lock`/`global_lock` are resolved once by the daemon; derived here when omitted.
+    """
     files = message_files(sp, role)
-    if not files:
-        return False
 
     selected: Optional[Dict[str, object]] = None
     task_id = ""
     task_claimed = False
 
+    # Taken lazily on the first live-lock check, then shared by the rest of the scan.
+    alive_pids: Optional[FrozenSet[int]] = None
+    pids_scanned = False
     for msg_path in files:
         try:
             raw = read_text(msg_path)
@@ -1307,24 +1899,24 @@ def process_one(
             return True
 
         front, _ = parse_frontmatter(raw)
-        mid = message_id(msg_path, front)
-        thread = str(front.get("thread", session)).strip() or session
-        request_from = str(front.get("from", "")).strip()
-        request_to = str(front.get("to", "")).strip()
-        request_intent = str(front.get("intent", "")).strip()
-
-        if done_sentinel(sp, mid, role).exists():
-            mkdirp((sp.state / "archive" / role))
-            msg_path.rename(archive_path(sp, role, msg_path))
+        ff = front_fields(msg_path, front, session)
+        mid, thread, task_id = ff.mid, ff.thread, ff.task_id
+        request_from, request_to, request_intent = ff.request_from, ff.request_to, ff.request_intent
+
+        if os.path.exists(done_sentinel(sp, mid, role)):
+            archive_message(sp, role, msg_path)
             LOG.info("message_already_done session=%s role=%s mid=%s", session, role, mid)
             return True
 
         lock_dir = processing_lock(sp, mid, role)
-        if lock_dir.exists():
-            pid = _read_lock_pid(lock_dir)
-            age_s = _lock_age_seconds(lock_dir)
-            if pid > 0 and _pid_alive(pid) and age_s < LOCK_STALE_SECONDS:
-                continue
+        lock_info = _inspect_lockdir(lock_dir)
+        if lock_info is not None:
+            pid, age_s = lock_info
+            if pid > 0 and age_s < LOCK_STALE_SECONDS:
+                if not pids_scanned:
+                    alive_pids, pids_scanned = _pid_snapshot(), True
+                if (pid in alive_pids) if alive_pids is not None else _pid_alive(pid):
+                    continue
             _cleanup_lockdir(lock_dir)
         try:
             os.mkdir(lock_dir)
@@ -1332,15 +1924,13 @@ def process_one(
         except FileExistsError:
             continue
 
-        task_id = str(front.get("task_id", "")).strip()
         if task_id:
             ok, _, reason = claim_task(sp.session_root, task_id=task_id, role=role, message_id=mid)
             if not ok:
                 blocked = reason in ("owner_mismatch", "claimed_by_other") or reason.startswith("deps_blocked")
                 if reason == "completed":
                     done_sentinel(sp, mid, role).write_text("ok\n", encoding="utf-8")
-                    mkdirp((sp.state / "archive" / role))
-                    msg_path.rename(archive_path(sp, role, msg_path))
+                    archive_message(sp, role, msg_path)
                     _cleanup_lockdir(lock_dir)
                     LOG.info("task_already_completed session=%s role=%s task_id=%s mid=%s", session, role, task_id, mid)
                     return True
@@ -1399,7 +1989,7 @@ def process_one(
             summary = run_lead_bootstrap(
                 sp,
                 session=session,
-                roles=list_roles(sp),
+                roles=roles if roles is not None else list_roles(sp),
                 source_message_id=mid,
             )
             write_receipt(
@@ -1427,17 +2017,17 @@ def process_one(
                 summary=summary,
             )
             done_sentinel(sp, mid, role).write_text("ok\n", encoding="utf-8")
-            mkdirp((sp.state / "archive" / role))
-            msg_path.rename(archive_path(sp, role, msg_path))
+            archive_message(sp, role, msg_path)
             LOG.info("bootstrap_handled session=%s role=%s mid=%s", session, role, mid)
             return True
         finally:
             _cleanup_lockdir(lock_dir)
 
     retries_path = sp.state / "processing" / f"{mid}.{role}.retries.json"
-    retries = load_json(retries_path)
+    retries = _load_retries(retries_path)
     n = int(retries.get("count", 0))
     if n >= 3:
+        _drop_retries(retries_path)
         mkdirp(deadletter_path(sp, role, msg_path).parent)
         msg_path.rename(deadletter_path(sp, role, msg_path))
         if task_id:
@@ -1476,42 +2066,55 @@ def process_one(
         LOG.warning("message_deadlettered session=%s role=%s mid=%s retries=%s", session, role, mid, n)
         return True
 
-    global_lock = sp.artifacts / "locks" / "autopilot.global.lockdir"
+    if use_global_lock is None:
+        use_global_lock = _use_global_lock()
+    if global_lock is None:
+        global_lock = global_lock_dir(sp)
     last_msg_path = sp.artifacts / "autopilot" / f"{role}.{mid}.last.txt"
     receipt_path = sp.bus / "outbox" / f"{mid}.{role}.md"
 
     codex_rc = 0
     status = "done"
     last_msg = ""
+    last_msg_bytes: Optional[bytes] = None
     baseline_repo_paths: List[str] = []
     try:
-        if not dry_run and not _role_allows_repo_writes(role):
-            mode = ROLE_BOUNDARY_MODE
-            if mode not in ("0", "off", "false", "disabled"):
-                baseline_repo_paths = _git_changed_paths(role_cwd)
-                if baseline_repo_paths:
-                    LOG.warning(
-                        "role_worktree_dirty_before_run session=%s role=%s count=%s paths=%s",
-                        session,
-                        role,
-                        len(baseline_repo_paths),
-                        baseline_repo_paths[:20],
-                    )
-
-        prompt = build_role_prompt(sp, session=session, role=role, msg_path=msg_path, msg_body=raw, task_id=task_id)
+        if (
+            not dry_run
+            and not _role_allows_repo_writes(role)
+            and ROLE_BOUNDARY_MODE not in ("0", "off", "false", "disabled")
+        ):
+            # Independent of the prompt: overlap the git status wait with building it.
+            with ThreadPoolExecutor(max_workers=1) as ex:
+                fut = ex.submit(_git_changed_paths, role_cwd)
+                prompt = build_role_prompt(
+                    sp, session=session, role=role, msg_path=msg_path, msg_body=raw, task_id=task_id
+                )
+                baseline_repo_paths = fut.result()
+            if baseline_repo_paths:
+                LOG.warning(
+                    "role_worktree_dirty_before_run session=%s role=%s count=%s paths=%s",
+                    session,
+                    role,
+                    len(baseline_repo_paths),
+                    baseline_repo_paths[:20],
+                )
+        else:
+            prompt = build_role_prompt(sp, session=session, role=role, msg_path=msg_path, msg_body=raw, task_id=task_id)
         if dry_run:
             last_msg = "DRY_RUN: skipped codex exec."
             LOG.info("dry_run_skip_codex session=%s role=%s mid=%s", session, role, mid)
         else:
-            if _use_global_lock():
+            if use_global_lock:
                 # Recover stale global lock (crash-safe).
-                if global_lock.exists():
-                    pid = _read_lock_pid(global_lock)
-                    age_s = _lock_age_seconds(global_lock)
+                lock_info = _inspect_lockdir(global_lock)
+                if lock_info is not None:
+                    pid, age_s = lock_info
                     if pid <= 0 or not _pid_alive(pid) or age_s >= LOCK_STALE_SECONDS:
                         _cleanup_lockdir(global_lock)
-                with DirLock(global_lock, timeout_s=1800.0):
-                    codex_rc = codex_exec(
+                # Long serial holds: back off to 1 s between retries when there is no dir watcher.
+                with DirLock(global_lock, poll_s=1.0, timeout_s=1800.0):
+                    codex_rc, last_msg_bytes = codex_exec(
                         role_cwd=role_cwd,
                         prompt=prompt,
                         out_last=last_msg_path,
@@ -1519,7 +2122,7 @@ def process_one(
                         add_dirs=[sp.session_root],
                     )
             else:
-                codex_rc = codex_exec(
+                codex_rc, last_msg_bytes = codex_exec(
                     role_cwd=role_cwd,
                     prompt=prompt,
                     out_last=last_msg_path,
@@ -1527,8 +2130,8 @@ def process_one(
                     add_dirs=[sp.session_root],
                 )
             LOG.info("codex_finished session=%s role=%s mid=%s rc=%s", session, role, mid, codex_rc)
-            if last_msg_path.exists():
-                last_msg = last_msg_path.read_text(encoding="utf-8")
+            if last_msg_bytes is not None:
+                last_msg = last_msg_bytes.decode("utf-8", "replace")
             else:
                 last_msg = "(no last message captured)"
             if codex_rc != 0:
@@ -1552,7 +2155,7 @@ def process_one(
             role,
             status=status,
             codex_rc=codex_rc,
-            last_msg=last_msg,
+            last_msg=last_msg_bytes if last_msg_bytes is not None else last_msg,
             thread=thread,
             request_from=request_from,
             request_to=request_to,
@@ -1582,16 +2185,17 @@ def process_one(
             dispatch_ready_tasks(
                 sp,
                 session=session,
-                roles=list_roles(sp),
+                roles=roles if roles is not None else list_roles(sp),
                 from_role="system",
             )
         done_sentinel(sp, mid, role).write_text("ok\n", encoding="utf-8")
-        mkdirp((sp.state / "archive" / role))
-        msg_path.rename(archive_path(sp, role, msg_path))
+        archive_message(sp, role, msg_path)
+        _drop_retries(retries_path, unlink=True)
         LOG.info("message_done session=%s role=%s mid=%s status=%s", session, role, mid, status)
         return True
     except RoleBoundaryError as e:
         msg = str(e)
+        _drop_retries(retries_path)
         if task_id and task_claimed:
             mark_task_failed(
                 sp.session_root,
@@ -1635,7 +2239,7 @@ def process_one(
         n += 1
         retries["count"] = n
         retries["last_error"] = str(e)
-        retries["last_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        retries["last_at"] = _now()
         save_json(retries_path, retries)
         if task_id and task_claimed:
             mark_task_failed(
@@ -1725,9 +2329,13 @@ def daemon(session: str, role: str, poll_s: float, dry_run: bool, *, model: str)
             return rc
 
         ensure_session_dirs(sp, roles=roles)
+        # Register everything this loop lists/waits on in one go (inbox + outbox for heartbeats).
+        _dir_watcher().watch_many([inbox_dir(sp, role), sp.bus / "outbox"])
 
         worktrees = parse_role_worktrees(sp.session_root / "SESSION.md")
         role_cwd = worktrees.get(role, sp.main_worktree)
+        use_global_lock = _use_global_lock()
+        global_lock = global_lock_dir(sp)
         LOG.info(
             "daemon_start session=%s role=%s pid=%s poll_s=%s model=%s dry_run=%s cwd=%s",
             session,
@@ -1741,41 +2349,57 @@ def daemon(session: str, role: str, poll_s: float, dry_run: bool, *, model: str)
 
         next_hb = 0.0
         next_dispatch = 0.0
+        next_forced_dispatch = 0.0
+        last_board_sig: Optional[Tuple[int, int]] = None
         while True:
             now = time.monotonic()
             if now >= next_hb:
-                log_heartbeat(sp, session=session, role=role, poll_s=poll_s)
+                if next_hb:
+                    # Roles/worktrees rarely change mid-session; re-check them once per heartbeat
+                    # (SESSION.md is only re-parsed when its stat changed).
+                    roles = list_roles(sp)
+                    cwd = parse_role_worktrees(sp.session_root / "SESSION.md").get(role, sp.main_worktree)
+                    if cwd != role_cwd:
+                        LOG.info("role_cwd_changed session=%s role=%s cwd=%s", session, role, cwd)
+                        role_cwd = cwd
+                log_heartbeat(sp, session=session, role=role, poll_s=poll_s, use_global_lock=use_global_lock)
                 next_hb = now + HEARTBEAT_SECONDS
             if now >= next_dispatch:
-                if role == "lead":
-                    try:
-                        sent = dispatch_ready_tasks(
-                            sp,
-                            session=session,
-                            roles=roles,
-                            from_role="lead",
-                        )
-                        if sent:
-                            LOG.info("lead_periodic_dispatch session=%s sent=%s", session, ",".join(sent))
-                    except Exception:
-                        LOG.exception("lead_periodic_dispatch_failed session=%s", session)
-                else:
-                    # Self-claim fallback (Claude-like): if lead is down, each role can
-                    # still pick up dispatchable tasks owned by itself.
-                    try:
-                        inbox_count = _count_md_files(sp.bus / "inbox" / role)
-                        if inbox_count == 0:
+                # Only rescan the board when it changed (claims, completions, new tasks) or
+                # once per heartbeat, which keeps time-based redelivery of stale dispatches.
+                board_sig = _task_board_sig(sp)
+                if board_sig != last_board_sig or now >= next_forced_dispatch:
+                    last_board_sig = board_sig
+                    next_forced_dispatch = now + HEARTBEAT_SECONDS
+                    if role == "lead":
+                        try:
                             sent = dispatch_ready_tasks(
                                 sp,
                                 session=session,
                                 roles=roles,
-                                from_role=role,
-                                owner=role,
+                                from_role="lead",
                             )
                             if sent:
-                                LOG.info("role_self_dispatch session=%s role=%s sent=%s", session, role, ",".join(sent))
-                    except Exception:
-                        LOG.exception("role_self_dispatch_failed session=%s role=%s", session, role)
+                                LOG.info("lead_periodic_dispatch session=%s sent=%s", session, ",".join(sent))
+                        except Exception:
+                            LOG.exception("lead_periodic_dispatch_failed session=%s", session)
+                    else:
+                        # Self-claim fallback (Claude-like): if lead is down, each role can
+                        # still pick up dispatchable tasks owned by itself.
+                        try:
+                            inbox_count = _count_md_files(sp.bus / "inbox" / role)
+                            if inbox_count == 0:
+                                sent = dispatch_ready_tasks(
+                                    sp,
+                                    session=session,
+                                    roles=roles,
+                                    from_role=role,
+                                    owner=role,
+                                )
+                                if sent:
+                                    LOG.info("role_self_dispatch session=%s role=%s sent=%s", session, role, ",".join(sent))
+                        except Exception:
+                            LOG.exception("role_self_dispatch_failed session=%s role=%s", session, role)
                 next_dispatch = now + DISPATCH_SCAN_SECONDS
             did = process_one(
                 sp,
@@ -1785,9 +2409,18 @@ def daemon(session: str, role: str, poll_s: float, dry_run: bool, *, model: str)
                 dry_run=dry_run,
                 model=model,
                 runtime_state=runtime_state,
+                roles=roles,
+                use_global_lock=use_global_lock,
+                global_lock=global_lock,
             )
             if not did:
-                _wait_for_dir_change(inbox_dir(sp, role), poll_s)
+                _MEMORY_BUFFER.flush()
+                inbox = inbox_dir(sp, role)
+                wait_s = poll_s
+                if _dir_watcher().watch(inbox):
+                    # Event-driven: new mail wakes us, so only scheduled work bounds the wait.
+                    wait_s = max(0.0, min(next_hb, next_dispatch) - time.monotonic())
+                _wait_for_dir_change(inbox, wait_s)
     except KeyboardInterrupt:
         rc = 130
         LOG.error(
@@ -1827,6 +2460,7 @@ def daemon(session: str, role: str, poll_s: float, dry_run: bool, *, model: str)
             runtime_state.get("last_path", "-"),
         )
     finally:
+        _MEMORY_BUFFER.flush()
         if prev_sigterm is not None:
             signal.signal(signal.SIGTERM, prev_sigterm)
         if prev_sigint is not None:
@@ -1847,6 +2481,76 @@ def daemon(session: str, role: str, poll_s: float, dry_run: bool, *, model: str)
     return rc
 
 
+def _daemon_all_role(session: str, role: str, poll_s: float, dry_run: bool, model: str) -> None:
+    """
+    Process target for daemon-all: one long-lived process per role. Drops state
+    inherited over fork (the watcher's kqueue/inotify fd) and exits with daemon()'s rc.
+    """
+    global _WATCHER
+    _WATCHER = None
+    raise SystemExit(daemon(session=session, role=role, poll_s=poll_s, dry_run=dry_run, model=model))
+
+
+def daemon_all(session: str, poll_s: float, dry_run: bool, *, model: str) -> int:
+    """
+    Run every role's daemon loop from one command, one child process per role.
+    Returns once all role loops have exited (highest rc); SIGTERM/SIGINT are
+    forwarded so each role logs its own EXIT line.
+    """
+    init_logging()
+    main = git_main_worktree(Path.cwd())
+    sp = session_paths(main, session)
+    if not sp.session_root.is_dir():
+        LOG.error("session_not_found session=%s path=%s", session, sp.session_root)
+        return 2
+    roles = list_roles(sp)
+    if not roles:
+        LOG.error("no_roles session=%s", session)
+        return 2
+
+    def _signal_handler(signum: int, _frame: object) -> None:
+        LOG.error("SIGNAL received session=%s role=* pid=%s signum=%s", session, os.getpid(), signum)
+        raise SystemExit(128 + int(signum))
+
+    LOG.info("daemon_all_start session=%s pid=%s roles=%s", session, os.getpid(), ",".join(roles))
+    procs: Dict[int, Tuple[str, multiprocessing.Process]] = {}
+    for r in roles:
+        proc = multiprocessing.Process(
+            target=_daemon_all_role,
+            args=(session, r, poll_s, dry_run, model),
+            name=f"autopilot-{r}",
+        )
+        proc.start()
+        procs[proc.sentinel] = (r, proc)
+    prev_sigterm = signal.signal(signal.SIGTERM, _signal_handler)
+    rc = 0
+    try:
+        while procs:
+            for sentinel in multiprocessing.connection.wait(list(procs)):
+                r, proc = procs.pop(sentinel)
+                proc.join()
+                code = proc.exitcode if proc.exitcode is not None else 2
+                code = code if code >= 0 else 128 - code
+                LOG.warning("daemon_all_role_exit session=%s role=%s rc=%s", session, r, code)
+                rc = max(rc, code)
+    except SystemExit as e:
+        rc = int(e.code) if isinstance(e.code, int) else 1
+    except KeyboardInterrupt:
+        rc = 130
+    finally:
+        signal.signal(signal.SIGTERM, prev_sigterm)
+        for _, proc in procs.values():
+            if proc.is_alive():
+                proc.terminate()
+        for _, proc in procs.values():
+            proc.join(10.0)
+            if proc.is_alive():
+                proc.kill()
+                proc.join()
+    LOG.info("daemon_all_exit session=%s rc=%s", session, rc)
+    return rc
+
+
 def run_once(session: str, role: str, dry_run: bool, *, model: str) -> int:
     init_logging()
     start_dir = Path.cwd()
@@ -1858,7 +2562,8 @@ def run_once(session: str, role: str, dry_run: bool, *, model: str) -> int:
     role_cwd = worktrees.get(role, sp.main_worktree)
     LOG.info("run_once_start session=%s role=%s pid=%s model=%s dry_run=%s", session, role, os.getpid(), model, dry_run)
     log_heartbeat(sp, session=session, role=role, poll_s=0.0)
-    did = process_one(sp, session=session, role=role, role_cwd=role_cwd, dry_run=dry_run, model=model)
+    did = process_one(sp, session=session, role=role, role_cwd=role_cwd, dry_run=dry_run, model=model, roles=roles)
+    _MEMORY_BUFFER.flush()
     LOG.info("run_once_finish session=%s role=%s processed=%s", session, role, did)
     return 0 if did else 3
 
@@ -1874,6 +2579,12 @@ def main() -> int:
     d.add_argument("--dry-run", action="store_true")
     d.add_argument("--model", default="", help="Codex model override (default: auto-detect).")
 
+    da = sub.add_parser("daemon-all", help="Run every role loop of the session from one command (blocking).")
+    da.add_argument("--session", required=True)
+    da.add_argument("--poll", type=float, default=2.0)
+    da.add_argument("--dry-run", action="store_true")
+    da.add_argument("--model", default="", help="Codex model override (default: auto-detect).")
+
     o = sub.add_parser("once", help="Process at most one message and exit.")
     o.add_argument("--session", required=True)
     o.add_argument("--role", required=True)
@@ -1884,6 +2595,8 @@ def main() -> int:
     model = choose_model(args.model)
     if args.cmd == "daemon":
         return daemon(session=args.session, role=args.role, poll_s=args.poll, dry_run=args.dry_run, model=model)
+    if args.cmd == "daemon-all":
+        return daemon_all(session=args.session, poll_s=args.poll, dry_run=args.dry_run, model=model)
     if args.cmd == "once":
         return run_once(session=args.session, role=args.role, dry_run=args.dry_run, model=model)
     raise AssertionError("unreachable")
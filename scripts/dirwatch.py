@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import os
+import secrets
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+
+# <sys/inotify.h>
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_WATCH_MASK = (
+    _IN_CREATE
+    | _IN_MOVED_TO
+    | _IN_CLOSE_WRITE
+    | _IN_ATTRIB
+    | _IN_DELETE
+    | _IN_MOVED_FROM
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+)
+_IN_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """
+    Minimal ctypes binding: inotify_init1/inotify_add_watch/inotify_rm_watch.
+    """
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._ctypes = ctypes
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = [ctypes.c_int, ctypes.c_int]
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+
+    def add_watch(self, path: Path) -> int:
+        wd = self._add(self.fd, os.fsencode(str(path)), _IN_WATCH_MASK)
+        if wd < 0:
+            err = self._ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(path))
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._rm(self.fd, wd)
+
+    def read_events(self) -> List[tuple]:
+        """
+        Drain all queued events as (wd, mask) pairs without blocking.
+        """
+        out: List[tuple] = []
+        while True:
+            try:
+                buf = os.read(self.fd, 65536)
+            except (BlockingIOError, InterruptedError):
+                return out
+            if not buf:
+                return out
+            off = 0
+            while off + _IN_EVENT.size <= len(buf):
+                wd, mask, _cookie, name_len = _IN_EVENT.unpack_from(buf, off)
+                out.append((wd, mask))
+                off += _IN_EVENT.size + name_len
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def scan_md_names(path: Path) -> List[str]:
+    """
+    Sorted names of regular `*.md` files directly under `path` ([] if missing).
+    """
+    try:
+        with os.scandir(path) as it:
+            names = [e.name for e in it if e.name.endswith(".md") and e.is_file(follow_symlinks=False)]
+    except OSError:
+        return []
+    names.sort()
+    return names
+
+
+def count_md_files(path: Path) -> int:
+    """
+    Number of regular `*.md` files directly under `path` (0 if missing); no sorting.
+    """
+    try:
+        with os.scandir(path) as it:
+            return sum(1 for e in it if e.name.endswith(".md") and e.is_file(follow_symlinks=False))
+    except OSError:
+        return 0
+
+
+class DirWatcher:
+    """
+    Long-lived watcher for flat bus directories (inbox/outbox).
+
+    Each directory is registered once for the process lifetime, with kqueue
+    (macOS/BSD) or inotify (Linux). The sorted `*.md` listing of a watched
+    directory is cached and only rescanned after the kernel reported a change
+    for it, so idle polls cost no directory reads. Without either backend,
+    `active` is False: callers sleep and scan.
+    """
+
+    def __init__(self, use_kqueue: bool = True, use_inotify: bool = False):
+        import select
+
+        self._select = select
+        self._kq = None
+        self._inotify: Optional[_Inotify] = None
+        # ident is the dir fd (kqueue) or the watch descriptor (inotify).
+        self._fd_to_path: Dict[int, Path] = {}
+        self._path_to_fd: Dict[Path, int] = {}
+        self._names: Dict[Path, List[str]] = {}
+        # Changed since the last listing scan / since the last wait() that reported it.
+        self._dirty: Set[Path] = set()
+        self._pending: Set[Path] = set()
+        if use_kqueue:
+            try:
+                self._kq = select.kqueue()
+            except Exception:
+                self._kq = None
+        if self._kq is None and use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except Exception:
+                self._inotify = None
+
+    @property
+    def active(self) -> bool:
+        return self._kq is not None or self._inotify is not None
+
+    def watching(self, path: Path) -> bool:
+        return path in self._path_to_fd
+
+    def watch(self, path: Path) -> bool:
+        """
+        Register `path` (idempotent). Returns False if it cannot be watched.
+        """
+        return path in self.watch_many([path])
+
+    def watch_many(self, paths: Iterable[Path]) -> Set[Path]:
+        """
+        Register every not-yet-watched path (one kevent submission on kqueue).
+        Returns the set of requested paths that are being watched.
+        """
+        if not self.active:
+            return set()
+        wanted = list(dict.fromkeys(paths))
+        if self._inotify is not None:
+            for path in wanted:
+                if path in self._path_to_fd:
+                    continue
+                try:
+                    wd = self._inotify.add_watch(path)
+                except OSError:
+                    continue
+                self._fd_to_path[wd] = path
+                self._path_to_fd[path] = wd
+                self._dirty.add(path)
+            return {p for p in wanted if p in self._path_to_fd}
+        sel = self._select
+        opened: Dict[int, Path] = {}
+        changes = []
+        for path in wanted:
+            if path in self._path_to_fd:
+                continue
+            try:
+                fd = os.open(str(path), getattr(os, "O_EVTONLY", os.O_RDONLY))
+            except OSError:
+                continue
+            opened[fd] = path
+            changes.append(
+                sel.kevent(
+                    fd,
+                    filter=sel.KQ_FILTER_VNODE,
+                    flags=sel.KQ_EV_ADD | sel.KQ_EV_CLEAR,
+                    fflags=(
+                        sel.KQ_NOTE_WRITE
+                        | sel.KQ_NOTE_EXTEND
+                        | sel.KQ_NOTE_ATTRIB
+                        | sel.KQ_NOTE_RENAME
+                        | sel.KQ_NOTE_DELETE
+                    ),
+                )
+            )
+        if changes:
+            try:
+                self._kq.control(changes, 0, 0)
+            except OSError:
+                for fd in opened:
+                    os.close(fd)
+                opened = {}
+        for fd, path in opened.items():
+            self._fd_to_path[fd] = path
+            self._path_to_fd[path] = fd
+            self._dirty.add(path)
+        return {p for p in wanted if p in self._path_to_fd}
+
+    def _forget(self, ident: int, *, release: bool = True) -> None:
+        path = self._fd_to_path.pop(ident, None)
+        if path is not None:
+            self._path_to_fd.pop(path, None)
+            self._names.pop(path, None)
+        if not release:
+            return
+        try:
+            if self._inotify is not None:
+                self._inotify.rm_watch(ident)
+            else:
+                os.close(ident)
+        except OSError:
+            pass
+
+    def _reap(self, timeout_s: float) -> Set[Path]:
+        if self._inotify is not None:
+            return self._reap_inotify(timeout_s)
+        sel = self._select
+        try:
+            events = self._kq.control(None, 64, max(0.0, timeout_s))
+        except InterruptedError:
+            return set()
+        changed: Set[Path] = set()
+        for ev in events:
+            path = self._fd_to_path.get(ev.ident)
+            if path is None:
+                continue
+            changed.add(path)
+            if ev.fflags & (sel.KQ_NOTE_DELETE | sel.KQ_NOTE_RENAME):
+                # The directory itself went away; re-register on next watch().
+                self._forget(ev.ident)
+        self._dirty |= changed
+        self._pending |= changed
+        return changed
+
+    def _reap_inotify(self, timeout_s: float) -> Set[Path]:
+        fd = self._inotify.fd
+        try:
+            ready, _, _ = self._select.select([fd], [], [], max(0.0, timeout_s))
+        except InterruptedError:
+            return set()
+        if not ready:
+            return set()
+        changed: Set[Path] = set()
+        for wd, mask in self._inotify.read_events():
+            if mask & _IN_Q_OVERFLOW:
+                # Events were dropped: treat every watched directory as changed.
+                changed |= set(self._path_to_fd)
+                continue
+            path = self._fd_to_path.get(wd)
+            if path is None:
+                continue
+            changed.add(path)
+            if mask & _IN_IGNORED:
+                self._forget(wd, release=False)
+            elif mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                self._forget(wd)
+        self._dirty |= changed
+        self._pending |= changed
+        return changed
+
+    def wait(self, timeout_s: float) -> Set[Path]:
+        """
+        Block until any watched directory changes or `timeout_s` elapses.
+        Returns the changed directories (empty on timeout). Inactive watchers just sleep.
+        """
+        if not self.active:
+            time.sleep(max(0.0, timeout_s))
+            return set()
+        if self._pending:
+            changed, self._pending = self._pending, set()
+            return changed
+        changed = self._reap(timeout_s)
+        self._pending -= changed
+        return changed
+
+    def wait_on(self, path: Path, timeout_s: float) -> bool:
+        """
+        Block until `path` changes or `timeout_s` elapses. True if a change was seen.
+        Changes to other watched directories stay pending for their own waiters.
+        Inactive watchers (or unwatched paths) sleep out the timeout and return False.
+        """
+        if path in self._pending:
+            self._pending.discard(path)
+            return True
+        if not self.active or path not in self._path_to_fd:
+            time.sleep(max(0.0, timeout_s))
+            return False
+        deadline = time.monotonic() + timeout_s
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if path in self._reap(remaining):
+                self._pending.discard(path)
+                return True
+            if path not in self._path_to_fd:
+                return False
+
+    def md_names(self, path: Path) -> List[str]:
+        """
+        Cached `scan_md_names(path)` for watched directories.
+        """
+        if not self.active or path not in self._path_to_fd:
+            return scan_md_names(path)
+        return list(self._cached_names(path))
+
+    def md_count(self, path: Path) -> int:
+        if not self.active or path not in self._path_to_fd:
+            return count_md_files(path)
+        return len(self._cached_names(path))
+
+    def _cached_names(self, path: Path) -> List[str]:
+        self._reap(0)
+        cached = self._names.get(path)
+        if cached is None or path in self._dirty:
+            # Clear before scanning: changes racing with the scan re-mark it dirty.
+            self._dirty.discard(path)
+            self._pending.discard(path)
+            cached = scan_md_names(path)
+            if path in self._path_to_fd:
+                self._names[path] = cached
+        return cached
+
+    def close(self) -> None:
+        for ident in list(self._fd_to_path):
+            self._forget(ident)
+        if self._kq is not None:
+            try:
+                self._kq.close()
+            except Exception:
+                pass
+            self._kq = None
+        if self._inotify is not None:
+            try:
+                self._inotify.close()
+            except Exception:
+                pass
+            self._inotify = None
+
+
+# Small POSIX/Linux file helpers shared by autopilot.py and router.py.
+
+_O_TMPFILE = getattr(os, "O_TMPFILE", 0)
+_HAS_WRITEV = hasattr(os, "writev")
+
+
+def tmp_name(name: str) -> str:
+    """
+    Hidden temp file name for publishing `name`; unique per call, so threads of one process
+    (autopilot's ThreadPoolExecutor) never share it.
+    """
+    return f".tmp.{name}.{os.getpid()}.{secrets.token_hex(4)}"
+
+
+def write_all(fd: int, parts: List[bytes]) -> None:
+    """
+    Write every part to `fd`: one writev when possible, os.write for the remainder.
+    """
+    written = os.writev(fd, parts) if _HAS_WRITEV and len(parts) > 1 else 0
+    total = sum(map(len, parts))
+    if written >= total:
+        return
+    data = memoryview(b"".join(parts) if len(parts) > 1 else parts[0])[written:]
+    while data:
+        data = data[os.write(fd, data) :]
+
+
+def link_tmpfile(path: Path, parts: List[bytes], *, durable: bool = False) -> bool:
+    """
+    Linux: write into an anonymous O_TMPFILE inode and link it in as `path`, so the
+    directory only ever sees the final name. False if unsupported (caller falls back).
+    """
+    if not _O_TMPFILE:
+        return False
+    try:
+        dfd = os.open(str(path.parent), os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    except OSError:
+        return False
+    try:
+        fd = os.open(".", _O_TMPFILE | os.O_WRONLY | getattr(os, "O_CLOEXEC", 0), 0o666, dir_fd=dfd)
+    except OSError:
+        os.close(dfd)
+        return False
+    try:
+        write_all(fd, parts)
+        if durable:
+            os.fsync(fd)
+        # dst_dir_fd makes os.link use linkat(AT_SYMLINK_FOLLOW), which resolves the /proc magic link.
+        proc_fd = f"/proc/self/fd/{fd}"
+        try:
+            os.link(proc_fd, path.name, dst_dir_fd=dfd)
+        except FileExistsError:
+            # linkat cannot replace: link under a temp name and rename over the target.
+            tmp = tmp_name(path.name)
+            os.link(proc_fd, tmp, dst_dir_fd=dfd)
+            os.replace(tmp, path.name, src_dir_fd=dfd, dst_dir_fd=dfd)
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+        os.close(dfd)
+
+
+def proc_ps_line(pid: int) -> str:
+    """
+    `ps -o pid,ppid,pgid,sid,tty,stat,command`-like line from /proc (Linux, no fork).
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat_raw = f.read().decode("utf-8", "replace")
+        # comm may contain spaces/parens: fields resume after the last ')'.
+        fields = stat_raw[stat_raw.rindex(")") + 2 :].split()
+        state, ppid, pgrp, sid, tty = fields[0], fields[1], fields[2], fields[3], fields[4]
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            cmd = f.read().replace(b"\0", b" ").decode("utf-8", "replace").strip()
+        return f"{pid} {ppid} {pgrp} {sid} {tty} {state} {cmd}"
+    except Exception as e:
+        return f"<proc-exception:{e}>"
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import functools
 import hashlib
 import logging
 import os
@@ -14,17 +15,49 @@ import traceback
 from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
+
+from dirwatch import DirWatcher, count_md_files, link_tmpfile, proc_ps_line, scan_md_names, tmp_name, write_all
 
 
 ROLE_ORDER = ["lead", "builder-a", "builder-b", "reviewer", "tester"]
+_ROLE_SET = frozenset(ROLE_ORDER)
 GLOBAL_LOCK_PID_SUFFIX = "autopilot.global.lockdir/pid"
 OP_TRACE_MAX = 10
-_RECENT_OPS: "deque[Dict[str, str]]" = deque(maxlen=OP_TRACE_MAX)
+# (ts, name, path, extra); the bounded deque is the ring buffer.
+_RECENT_OPS: "deque[Tuple[str, str, str, str]]" = deque(maxlen=OP_TRACE_MAX)
 _PID_RE = re.compile(r"^[0-9]+$")
+# One header line: a `  - item` or a `key: value`.
+_FRONT_LINE_RE = re.compile(r"^(?:  - (.*)|([A-Za-z0-9_-]+):(.*))$", re.M)
+# A line whose strip() is "---"; only valid where "\n" is the sole line break (see parse_front).
+_FRONT_CLOSE_RE = re.compile(r"^[^\S\n]*---[^\S\n]*$", re.M)
+# Line breaks str.splitlines() honours besides "\n".
+_ODD_LINE_BREAK_RE = re.compile("[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+_BUS_SEND_RE = re.compile(r"::bus-send\{([^}]*)\}")
+# One `key=value` pair of a directive block; \w matches str.isalnum() chars plus "_".
+_KV_RE = re.compile(r'\s*([\w-]+)\s*=\s*(?:"([^"\\]*(?:\\.[^"\\]*)*\\?)"?|(\S+))', re.S)
+_KV_UNESCAPE_RE = re.compile(r"\\(.)", re.S)
+_ROLE_SPLIT_RE = re.compile(r"[,\s]+")
+_ERRNO22_PATH_RE = re.compile(r"([/][^'\"]*autopilot\.global\.lockdir/pid)")
 HEARTBEAT_SECONDS = 30.0
 LOG = logging.getLogger("router")
 USE_KQUEUE = (sys.platform == "darwin") and (os.environ.get("ROUTER_USE_KQUEUE", "1") != "0")
+USE_INOTIFY = sys.platform.startswith("linux") and (os.environ.get("ROUTER_USE_INOTIFY", "1") != "0")
+_WATCHER: Optional[DirWatcher] = None
+_MAIN_WT_CACHE: Dict[Path, Path] = {}
+# dir -> (st_mtime_ns, `*.md` count) as of the last heartbeat.
+_MD_COUNT_CACHE: Dict[Path, Tuple[int, int]] = {}
+# Processed-marker file -> (sha256, "mtime_ns:size"). Re-validated against processed/ on every
+# heartbeat (sync_processed_markers), so deleted or externally written markers are picked up.
+_PROCESSED_MARKERS: Dict[Path, Tuple[str, str]] = {}
+# Marker file -> (mtime_ns, size) of the marker itself when it was last read; None after our own write.
+_PROCESSED_MARKER_SIGS: Dict[Path, Optional[Tuple[int, int]]] = {}
+# Directories this process already created or found; dropped again if a write finds one gone.
+_ENSURED_DIRS: Set[str] = set()
+# Formatted local time for the current second: (log/receipt form, id/filename form).
+_NOW_SEC = -1
+_NOW_STR = ""
+_NOW_ID_STR = ""
 
 
 @dataclass
@@ -36,6 +69,30 @@ class SessionPaths:
     artifacts: Path
     shared: Path
     roles: Path
+    # Derived once so hot paths skip re-joining them per receipt.
+    inbox: Path
+    outbox: Path
+    processed: Path
+
+
+def _refresh_now() -> None:
+    global _NOW_SEC, _NOW_STR, _NOW_ID_STR
+    sec = int(time.time())
+    if sec != _NOW_SEC:
+        tm = time.localtime(sec)
+        _NOW_SEC = sec
+        _NOW_STR = time.strftime("%Y-%m-%d %H:%M:%S", tm)
+        _NOW_ID_STR = time.strftime("%Y%m%d-%H%M%S", tm)
+
+
+def _now() -> str:
+    _refresh_now()
+    return _NOW_STR
+
+
+def _now_id() -> str:
+    _refresh_now()
+    return _NOW_ID_STR
 
 
 def init_logging() -> None:
@@ -44,7 +101,8 @@ def init_logging() -> None:
     h = logging.StreamHandler(sys.stderr)
     h.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [router] %(message)s"))
     LOG.addHandler(h)
-    LOG.setLevel(logging.INFO)
+    level = getattr(logging, os.environ.get("ROUTER_LOG_LEVEL", "INFO").strip().upper(), logging.INFO)
+    LOG.setLevel(level if isinstance(level, int) else logging.INFO)
     LOG.propagate = False
 
 
@@ -72,79 +130,41 @@ def _signal_process_context(*, session: str, role: str) -> str:
     except Exception as e:
         cwd = f"<cwd-error:{e}>"
 
-    ps_line = "<ps-unavailable>"
-    try:
-        ps_attempts = [
-            ["ps", "-o", "pid,ppid,pgid,sid,tty,stat,etime,command", "-p", str(pid)],
-            ["ps", "-o", "pid,ppid,pgid,sess,tty,stat,etime,command", "-p", str(pid)],
-        ]
-        last_err = ""
-        for ps_cmd in ps_attempts:
-            p = subprocess.run(
-                ps_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=False,
-            )
-            if p.returncode == 0 and p.stdout.strip():
-                ps_line = " | ".join([ln.strip() for ln in p.stdout.splitlines() if ln.strip()])
-                break
-            if p.stderr.strip():
-                last_err = f"<ps-rc={p.returncode} err={p.stderr.strip()}>"
-            else:
-                last_err = f"<ps-rc={p.returncode}>"
-        if ps_line == "<ps-unavailable>" and last_err:
-            ps_line = last_err
-    except Exception as e:
-        ps_line = f"<ps-exception:{e}>"
+    prefix = f"session={session} role={role} pid={pid} ppid={ppid} pgid={pgid} sid={sid} cwd={cwd}"
+    if sys.platform.startswith("linux"):
+        return f"{prefix} ps=\"{proc_ps_line(pid)}\""
+    return prefix
 
-    return (
-        f"session={session} role={role} pid={pid} ppid={ppid} pgid={pgid} sid={sid} "
-        f"cwd={cwd} ps=\"{ps_line}\""
-    )
 
+def _dir_watcher() -> DirWatcher:
+    global _WATCHER
+    if _WATCHER is None:
+        _WATCHER = DirWatcher(use_kqueue=USE_KQUEUE, use_inotify=USE_INOTIFY)
+    return _WATCHER
 
-def _wait_for_dir_change(path: Path, timeout_s: float) -> None:
+
+def _wait_for_dir_change(path: Path, timeout_s: float) -> bool:
+    """
+    Wait up to `timeout_s` for `path` to change. False only when a kernel watch saw no change;
+    unwatched directories always report True (the caller has to look).
+    """
     if timeout_s <= 0:
-        return
-    if not USE_KQUEUE or not path.is_dir():
-        time.sleep(timeout_s)
-        return
-    try:
-        import select  # local import: only supported on some platforms
+        return True
+    w = _dir_watcher()
+    if not w.watching(path):
+        # Newly (re-)registered: whatever landed before the watch existed was never reported.
+        if not w.watch(path):
+            time.sleep(timeout_s)
+        return True
+    return w.wait_on(path, timeout_s)
 
-        oflag = getattr(os, "O_EVTONLY", os.O_RDONLY)
-        fd = os.open(str(path), oflag)
-        try:
-            kq = select.kqueue()
-            try:
-                ev = select.kevent(
-                    fd,
-                    filter=select.KQ_FILTER_VNODE,
-                    flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
-                    fflags=(
-                        select.KQ_NOTE_WRITE
-                        | select.KQ_NOTE_EXTEND
-                        | select.KQ_NOTE_ATTRIB
-                        | select.KQ_NOTE_RENAME
-                        | select.KQ_NOTE_DELETE
-                    ),
-                )
-                kq.control([ev], 0, 0)
-                kq.control(None, 1, timeout_s)
-            finally:
-                try:
-                    kq.close()
-                except Exception:
-                    pass
-        finally:
-            try:
-                os.close(fd)
-            except Exception:
-                pass
-    except Exception:
-        time.sleep(timeout_s)
+
+def _list_outbox(outbox: Path) -> List[Path]:
+    if _WATCHER is not None and _WATCHER.watching(outbox):
+        names = _WATCHER.md_names(outbox)
+    else:
+        names = scan_md_names(outbox)
+    return [outbox / name for name in names]
 
 
 def _run(cmd: List[str], cwd: Optional[Path] = None, timeout_s: Optional[float] = None) -> str:
@@ -165,11 +185,26 @@ def _run(cmd: List[str], cwd: Optional[Path] = None, timeout_s: Optional[float]
 
 
 def git_main_worktree(start_dir: Path) -> Path:
-    top = _run(["git", "-C", str(start_dir), "rev-parse", "--show-toplevel"]).strip()
-    common = _run(["git", "-C", top, "rev-parse", "--git-common-dir"]).strip()
+    """
+    Main worktree for `start_dir`, resolved with git once per directory per process.
+    """
+    key = start_dir.resolve()
+    cached = _MAIN_WT_CACHE.get(key)
+    if cached is None:
+        cached = _MAIN_WT_CACHE[key] = _git_main_worktree(key)
+    return cached
+
+
+def _git_main_worktree(start_dir: Path) -> Path:
+    out = _run(["git", "-C", str(start_dir), "rev-parse", "--show-toplevel", "--git-common-dir"])
+    try:
+        top, common = out.strip().splitlines()
+    except ValueError:
+        raise RuntimeError(f"unexpected git rev-parse output in {start_dir}: {out!r}") from None
     common_path = Path(common)
     if not common_path.is_absolute():
-        common_path = (Path(top) / common_path).resolve()
+        # Relative to the directory git ran in, not to the toplevel.
+        common_path = (start_dir / common_path).resolve()
     # Main worktree:
     # - main repo: .../.git
     # - linked worktree: .../.git/worktrees/<name>
@@ -190,15 +225,41 @@ def session_paths(main_worktree: Path, session: str) -> SessionPaths:
         artifacts=root / "artifacts",
         shared=root / "shared",
         roles=root / "roles",
+        inbox=root / "bus" / "inbox",
+        outbox=root / "bus" / "outbox",
+        processed=root / "state" / "router" / "processed",
     )
 
 
 def mkdirp(path: Path) -> None:
+    key = os.fspath(path)
+    if key in _ENSURED_DIRS:
+        return
     path.mkdir(parents=True, exist_ok=True)
+    _ENSURED_DIRS.add(key)
 
 
 def read_text(path: Path) -> str:
-    return path.read_text(encoding="utf-8")
+    return read_bytes(path).decode("utf-8")
+
+
+def read_bytes(path: Path) -> bytes:
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size + 1)
+        if len(data) > size:
+            # Grew since fstat: drain the rest.
+            parts = [data]
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                parts.append(chunk)
+            data = b"".join(parts)
+    finally:
+        os.close(fd)
+    return data
 
 
 def parse_frontmatter(md: str) -> Tuple[Dict[str, object], str]:
@@ -211,53 +272,66 @@ def parse_frontmatter(md: str) -> Tuple[Dict[str, object], str]:
     lines = md.splitlines()
     if len(lines) < 3 or lines[0].strip() != "---":
         return {}, md
+    for i in range(1, len(lines)):
+        if lines[i].strip() == "---":
+            body = "\n".join(lines[i + 1 :]).lstrip("\n")
+            return _parse_fm_block("\n".join(lines[1:i])), body
+    return {}, md
+
+
+def parse_front(md: str) -> Dict[str, object]:
+    """
+    parse_frontmatter(md)[0] without splitting or joining the body: receipts only need
+    their header. Falls back to the full parser for line breaks other than "\n".
+    """
+    nl = md.find("\n")
+    if nl < 0:
+        return parse_frontmatter(md)[0]
+    m = _FRONT_CLOSE_RE.search(md, nl + 1)
+    if m is None or _ODD_LINE_BREAK_RE.search(md, 0, m.start()) is not None:
+        return parse_frontmatter(md)[0]
+    if md[:nl].strip() != "---":
+        return {}
+    return _parse_fm_block(md, nl + 1, m.start())
+
+
+def _parse_fm_block(text: str, start: int = 0, end: Optional[int] = None) -> Dict[str, object]:
+    """
+    Header fields from text[start:end] ("\n"-separated lines) in one findall, without splitting.
+    """
     fm: Dict[str, object] = {}
-    i = 1
     current_key = None
-    while i < len(lines):
-        line = lines[i]
-        if line.strip() == "---":
-            body = "\n".join(lines[i + 1 :]).lstrip("\n")
-            return fm, body
-        if line.startswith("  - ") and current_key:
-            val = line[4:].strip()
-            if val.startswith('"') and val.endswith('"'):
-                val = val[1:-1]
-            if isinstance(fm.get(current_key), list):
-                fm[current_key].append(val)
-            else:
-                fm[current_key] = [val]
-            i += 1
-            continue
-        m = re.match(r"^([A-Za-z0-9_\-]+):\s*(.*)$", line)
-        if m:
-            k = m.group(1)
-            v = m.group(2).strip()
-            current_key = k
+    # List of the current key, created by its first `  - ` item (replacing the scalar).
+    items: Optional[List[str]] = None
+    for item, k, v in _FRONT_LINE_RE.findall(text, start, len(text) if end is None else end):
+        if k:
+            v = v.strip()
             if v.startswith('"') and v.endswith('"'):
                 v = v[1:-1]
             fm[k] = v
-        i += 1
-    return {}, md
+            current_key = k
+            items = None
+        elif current_key:
+            item = item.strip()
+            if item.startswith('"') and item.endswith('"'):
+                item = item[1:-1]
+            if items is None:
+                items = fm[current_key] = []
+            items.append(item)
+    return fm
 
 
 def list_roles(sp: SessionPaths) -> List[str]:
-    roles: List[str] = []
-    if sp.roles.is_dir():
-        for d in sp.roles.iterdir():
-            if d.is_dir():
-                roles.append(d.name)
+    try:
+        with os.scandir(sp.roles) as it:
+            roles = {e.name for e in it if e.name in _ROLE_SET and e.is_dir()}
+    except OSError:
+        return []
     return [r for r in ROLE_ORDER if r in roles]
 
 
-def sha256_text(s: str) -> str:
-    h = hashlib.sha256()
-    h.update(s.encode("utf-8"))
-    return h.hexdigest()
-
-
 def processed_state_dir(sp: SessionPaths) -> Path:
-    return sp.state / "router" / "processed"
+    return sp.processed
 
 
 def processed_state_file(sp: SessionPaths, receipt_path: Path) -> Path:
@@ -267,52 +341,83 @@ def processed_state_file(sp: SessionPaths, receipt_path: Path) -> Path:
 
 
 def ensure_dirs(sp: SessionPaths) -> None:
-    mkdirp(sp.bus / "outbox")
-    mkdirp(sp.bus / "inbox")
-    mkdirp(sp.state / "router" / "processed")
+    mkdirp(sp.outbox)
+    mkdirp(sp.inbox)
+    mkdirp(sp.processed)
     mkdirp(sp.state / "router" / "bad-receipts")
     mkdirp(sp.state / "router" / "bad-locks")
 
 
 def inbox_dir(sp: SessionPaths, role: str) -> Path:
-    return sp.bus / "inbox" / role
+    return sp.inbox / role
 
 
 def new_id(prefix: str) -> str:
     import secrets
 
-    ts = time.strftime("%Y%m%d-%H%M%S")
+    ts = _now_id()
     return f"{prefix}{ts}-{secrets.token_hex(3)}"
 
 
-def atomic_write(path: Path, text: str) -> None:
+def atomic_write(path: Path, text: str, *, durable: bool = False) -> None:
+    atomic_write_parts(path, [text.encode("utf-8")], durable=durable)
+
+
+def atomic_write_parts(path: Path, parts: List[bytes], *, durable: bool = False) -> None:
+    """
+    Write `parts` (one writev) via an O_TMPFILE link on Linux, otherwise a temp file +
+    rename. `durable` fsyncs before publishing; bus/state files skip it.
+    """
     mkdirp(path.parent)
-    tmp = path.parent / f".tmp.{path.name}.{os.getpid()}"
-    tmp.write_text(text, encoding="utf-8")
-    tmp.replace(path)
+    if link_tmpfile(path, parts, durable=durable):
+        return
+    tmp = path.parent / tmp_name(path.name)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0)
+    try:
+        fd = os.open(tmp, flags, 0o666)
+    except FileNotFoundError:
+        # Removed after mkdirp() remembered it.
+        _ENSURED_DIRS.discard(os.fspath(path.parent))
+        mkdirp(path.parent)
+        fd = os.open(tmp, flags, 0o666)
+    try:
+        write_all(fd, parts)
+        if durable:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
 
 
 def _count_md_files(path: Path) -> int:
+    """
+    `*.md` count for `path`, rescanned only when the directory mtime changed.
+    """
+    if _WATCHER is not None and _WATCHER.watching(path):
+        return _WATCHER.md_count(path)
     try:
-        return sum(1 for p in path.glob("*.md") if p.is_file())
-    except Exception:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        _MD_COUNT_CACHE.pop(path, None)
         return 0
+    cached = _MD_COUNT_CACHE.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    n = count_md_files(path)
+    _MD_COUNT_CACHE[path] = (mtime_ns, n)
+    return n
 
 
-def _count_inbox_files(sp: SessionPaths) -> int:
-    total = 0
-    try:
-        for role_dir in (sp.bus / "inbox").glob("*"):
-            if role_dir.is_dir():
-                total += _count_md_files(role_dir)
-    except Exception:
-        return 0
-    return total
+def _count_bus(sp: SessionPaths, roles: List[str]) -> Tuple[int, int]:
+    """
+    (inbox total over `roles`, outbox) `*.md` counts; unchanged dirs reuse their last count.
+    """
+    inbox_total = sum(_count_md_files(sp.inbox / r) for r in roles)
+    return inbox_total, _count_md_files(sp.outbox)
 
 
-def log_heartbeat(sp: SessionPaths, session: str, poll_s: float) -> None:
-    inbox_count = _count_inbox_files(sp)
-    outbox_count = _count_md_files(sp.bus / "outbox")
+def log_heartbeat(sp: SessionPaths, session: str, poll_s: float, roles: List[str]) -> None:
+    inbox_count, outbox_count = _count_bus(sp, roles)
     LOG.info(
         "heartbeat session=%s role=router pid=%s poll_s=%s inbox_count=%s outbox_count=%s current_task_id=%s",
         session,
@@ -325,29 +430,20 @@ def log_heartbeat(sp: SessionPaths, session: str, poll_s: float) -> None:
 
 
 def record_op(name: str, path: Path, extra: str = "") -> None:
-    rec = {
-        "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
-        "name": name,
-        "path": str(path),
-        "extra": extra,
-    }
-    _RECENT_OPS.append(rec)
+    _RECENT_OPS.append((_now(), name, os.fspath(path), extra))
     LOG.info("[op] name=%s path=%s extra=%s", name, path, extra)
 
 
 def recent_ops_lines() -> List[str]:
     lines: List[str] = []
-    for i, rec in enumerate(_RECENT_OPS, start=1):
-        lines.append(
-            f"{i}. ts={rec.get('ts','')} name={rec.get('name','')} "
-            f"path={rec.get('path','')} extra={rec.get('extra','')}"
-        )
+    for i, (ts, name, path, extra) in enumerate(_RECENT_OPS, start=1):
+        lines.append(f"{i}. ts={ts} name={name} path={path} extra={extra}")
     return lines
 
 
-def safe_read_text(path: Path) -> str:
+def safe_read_bytes(path: Path) -> bytes:
     record_op("read", path)
-    return read_text(path)
+    return read_bytes(path)
 
 
 def safe_atomic_write(path: Path, text: str, extra: str = "") -> None:
@@ -355,6 +451,11 @@ def safe_atomic_write(path: Path, text: str, extra: str = "") -> None:
     atomic_write(path, text)
 
 
+def safe_atomic_write_parts(path: Path, parts: List[bytes], extra: str = "") -> None:
+    record_op("write", path, extra=extra)
+    atomic_write_parts(path, parts)
+
+
 def safe_rename(src: Path, dst: Path) -> None:
     record_op("rename", src, extra=f"src={src} dst={dst}")
     os.rename(src, dst)
@@ -370,27 +471,22 @@ def enqueue_bus_message(
     risk: str,
     body: str,
     mid: Optional[str] = None,
+    body_parts: Optional[List[bytes]] = None,
 ) -> Path:
+    """
+    `body_parts`, if given, replaces `body` with pre-encoded segments written as-is
+    (the caller keeps them free of trailing whitespace).
+    """
     mid = mid or new_id("router-")
     out = inbox_dir(sp, to_role) / f"{mid}.md"
-    text = "\n".join(
-        [
-            "---",
-            f"id: {mid}",
-            f"from: {from_role}",
-            f"to: {to_role}",
-            f"intent: {intent}",
-            f"thread: {thread}",
-            f"risk: {risk}",
-            "---",
-            "",
-            body.rstrip(),
-            "",
-        ]
+    head = (
+        f"---\nid: {mid}\nfrom: {from_role}\nto: {to_role}\nintent: {intent}\n"
+        f"thread: {thread}\nrisk: {risk}\n---\n\n"
     )
-    safe_atomic_write(
+    # Header and body go out as separate writev segments; the body is never joined into a bigger str.
+    safe_atomic_write_parts(
         out,
-        text,
+        [head.encode("utf-8"), *(body_parts or [body.rstrip().encode("utf-8")]), b"\n"],
         extra=f"phase=inbox-write from={from_role} to={to_role} intent={intent}",
     )
     return out
@@ -402,7 +498,7 @@ def quarantine_receipt(sp: SessionPaths, receipt_path: Path, reason: str) -> Non
     """
     bad_dir = sp.state / "router" / "bad-receipts"
     mkdirp(bad_dir)
-    ts = time.strftime("%Y%m%d-%H%M%S")
+    ts = _now_id()
     target = bad_dir / f"{receipt_path.name}.{ts}.bad"
     note = bad_dir / f"{receipt_path.name}.{ts}.error.txt"
     moved_to = receipt_path
@@ -415,7 +511,7 @@ def quarantine_receipt(sp: SessionPaths, receipt_path: Path, reason: str) -> Non
         note.write_text(
             "\n".join(
                 [
-                    f"time: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+                    f"time: {_now()}",
                     f"receipt: {receipt_path}",
                     f"moved_to: {moved_to}",
                     f"reason: {reason}",
@@ -431,27 +527,16 @@ def quarantine_receipt(sp: SessionPaths, receipt_path: Path, reason: str) -> Non
 
 def write_router_lock_receipt(sp: SessionPaths, status: str, body: str) -> Path:
     rid = new_id("router-lock-")
-    out = sp.bus / "outbox" / f"{rid}.router.md"
-    ts = time.strftime("%Y-%m-%d %H:%M:%S")
-    text = "\n".join(
-        [
-            "---",
-            f"id: {rid}",
-            "role: router",
-            f'thread: "{sp.session_root.name}"',
-            'request_from: "router"',
-            'request_to: "lead"',
-            'request_intent: "warn"',
-            f"status: {status}",
-            "codex_rc: 0",
-            f'finished_at: "{ts}"',
-            "---",
-            "",
-            body.rstrip(),
-            "",
-        ]
+    out = sp.outbox / f"{rid}.router.md"
+    ts = _now()
+    head = (
+        f"---\nid: {rid}\nrole: router\nthread: \"{sp.session_root.name}\"\n"
+        'request_from: "router"\nrequest_to: "lead"\nrequest_intent: "warn"\n'
+        f"status: {status}\ncodex_rc: 0\nfinished_at: \"{ts}\"\n---\n\n"
+    )
+    safe_atomic_write_parts(
+        out, [head.encode("utf-8"), body.rstrip().encode("utf-8"), b"\n"], extra="phase=router-lock-receipt"
     )
-    safe_atomic_write(out, text, extra="phase=router-lock-receipt")
     return out
 
 
@@ -465,7 +550,7 @@ def _extract_errno22_path(err: OSError) -> Optional[Path]:
         cands.append(fn2)
 
     text = str(err)
-    m = re.search(r"([/][^'\"]*autopilot\.global\.lockdir/pid)", text)
+    m = _ERRNO22_PATH_RE.search(text)
     if m:
         cands.append(m.group(1))
 
@@ -551,7 +636,7 @@ def quarantine_global_lockdir(sp: SessionPaths) -> Tuple[bool, str]:
 
     bad_root = sp.state / "router" / "bad-locks"
     mkdirp(bad_root)
-    ts = time.strftime("%Y%m%d-%H%M%S")
+    ts = _now_id()
     dst = bad_root / f"{ts}-autopilot.global.lockdir"
 
     try:
@@ -649,49 +734,18 @@ def parse_kv_block(s: str) -> Dict[str, str]:
     into a dict. Supports quoted values with \\" escaping.
     """
     out: Dict[str, str] = {}
-    i = 0
-    n = len(s)
-    while i < n:
-        while i < n and s[i].isspace():
-            i += 1
-        if i >= n:
+    pos = 0
+    match = _KV_RE.match
+    while True:
+        m = match(s, pos)
+        if m is None:
             break
-        # key
-        k_start = i
-        while i < n and (s[i].isalnum() or s[i] in "_-"):
-            i += 1
-        key = s[k_start:i]
-        while i < n and s[i].isspace():
-            i += 1
-        if not key or i >= n or s[i] != "=":
-            break
-        i += 1
-        while i < n and s[i].isspace():
-            i += 1
-        if i >= n:
-            break
-        val = ""
-        if s[i] == '"':
-            i += 1
-            buf = []
-            while i < n:
-                ch = s[i]
-                if ch == "\\" and i + 1 < n:
-                    buf.append(s[i + 1])
-                    i += 2
-                    continue
-                if ch == '"':
-                    i += 1
-                    break
-                buf.append(ch)
-                i += 1
-            val = "".join(buf)
+        quoted = m.group(2)
+        if quoted is not None:
+            out[m.group(1)] = _KV_UNESCAPE_RE.sub(r"\1", quoted) if "\\" in quoted else quoted
         else:
-            v_start = i
-            while i < n and not s[i].isspace():
-                i += 1
-            val = s[v_start:i]
-        out[key] = val
+            out[m.group(1)] = m.group(3)
+        pos = m.end()
     return out
 
 
@@ -703,7 +757,7 @@ def parse_bus_send_directives(text: str) -> List[Dict[str, str]]:
       ::bus-send{to="reviewer,tester" intent="test" risk="low" message="..."}
     """
     out: List[Dict[str, str]] = []
-    for m in re.finditer(r"::bus-send\{([^}]*)\}", text):
+    for m in _BUS_SEND_RE.finditer(text):
         args = parse_kv_block(m.group(1))
         if args:
             out.append(args)
@@ -743,7 +797,7 @@ def parse_target_roles(roles: List[str], to_expr: str, *, sender_role: str) -> L
         return []
 
     out: List[str] = []
-    parts = [p for p in re.split(r"[,\s]+", to_expr) if p]
+    parts = [p for p in _ROLE_SPLIT_RE.split(to_expr) if p]
     for p in parts:
         if p.lower() == "all":
             for r in roles:
@@ -829,27 +883,118 @@ def dispatch_from_receipt(
                 )
 
 
+def _parse_processed_marker(text: str) -> Tuple[str, str]:
+    lines = text.split("\n")
+    return lines[0].strip(), (lines[1].strip() if len(lines) > 1 else "")
+
+
+def _read_processed_marker(st_file: Path) -> Tuple[str, str]:
+    """
+    (sha256, "mtime_ns:size") from a processed marker; the stat line is "" in old one-line markers.
+    Served from the in-process cache once the marker has been read or written.
+    """
+    cached = _PROCESSED_MARKERS.get(st_file)
+    if cached is not None:
+        return cached
+    try:
+        if not st_file.exists():
+            return "", ""
+        record_op("read", st_file, extra="phase=processed-state-read")
+        marker = _parse_processed_marker(read_text(st_file))
+    except Exception:
+        return "", ""
+    _PROCESSED_MARKERS[st_file] = marker
+    return marker
+
+
+def _write_processed_marker(st_file: Path, cur_hash: str, cur_stat: str) -> None:
+    try:
+        safe_atomic_write(st_file, f"{cur_hash}\n{cur_stat}\n", extra="phase=mark-processed")
+    except Exception as e:
+        LOG.warning("mark_processed_failed file=%s err=%s", st_file, e)
+        _PROCESSED_MARKERS.pop(st_file, None)
+        _PROCESSED_MARKER_SIGS.pop(st_file, None)
+        return
+    _PROCESSED_MARKERS[st_file] = (cur_hash, cur_stat)
+    _PROCESSED_MARKER_SIGS[st_file] = None
+
+
+def sync_processed_markers(sp: SessionPaths) -> int:
+    """
+    Bring the marker cache in line with processed/ in one directory pass: markers deleted
+    on disk are dropped (so their receipts are replayed), new or rewritten ones (e.g. by a
+    concurrent `router.py once`) are re-read. Returns the number of markers cached.
+    """
+    pdir = processed_state_dir(sp)
+    seen: Set[Path] = set()
+    try:
+        with os.scandir(pdir) as it:
+            entries = [e for e in it if e.name.endswith(".sha256") and e.is_file(follow_symlinks=False)]
+    except OSError:
+        entries = []
+    for e in entries:
+        st_file = pdir / e.name
+        try:
+            st = e.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        sig = (st.st_mtime_ns, st.st_size)
+        seen.add(st_file)
+        if st_file in _PROCESSED_MARKERS and _PROCESSED_MARKER_SIGS.get(st_file) == sig:
+            continue
+        try:
+            _PROCESSED_MARKERS[st_file] = _parse_processed_marker(read_text(st_file))
+        except Exception:
+            _PROCESSED_MARKERS.pop(st_file, None)
+            seen.discard(st_file)
+            continue
+        _PROCESSED_MARKER_SIGS[st_file] = sig
+    for st_file in [f for f in _PROCESSED_MARKERS if f.parent == pdir and f not in seen]:
+        _PROCESSED_MARKERS.pop(st_file, None)
+        _PROCESSED_MARKER_SIGS.pop(st_file, None)
+    return len(seen)
+
+
+# Keyed by the raw receipt text; results are shared, so callers must not mutate them.
+# Kept small: entries pin whole receipt bodies.
+@functools.lru_cache(maxsize=64)
+def _parse_front_cached(raw: str) -> Dict[str, object]:
+    return parse_front(raw)
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_directives_cached(raw: str) -> List[Dict[str, str]]:
+    return parse_bus_send_directives(raw)
+
+
 def process_receipt(sp: SessionPaths, roles: List[str], receipt_path: Path, dry_run: bool) -> bool:
+    st_file = processed_state_file(sp, receipt_path)
+    prev_hash, prev_stat = _read_processed_marker(st_file)
+    try:
+        st = os.stat(receipt_path)
+        cur_stat = f"{st.st_mtime_ns}:{st.st_size}"
+    except OSError:
+        cur_stat = ""
+    if prev_hash and cur_stat and prev_stat == cur_stat:
+        # Unchanged since it was marked processed: skip the read + hash.
+        return False
+
     try:
-        raw = safe_read_text(receipt_path)
+        raw_bytes = safe_read_bytes(receipt_path)
+        raw = raw_bytes.decode("utf-8")
     except Exception as e:
         quarantine_receipt(sp, receipt_path, f"read failed: {e}")
         return True
 
-    cur_hash = sha256_text(raw)
-    st_file = processed_state_file(sp, receipt_path)
-    try:
-        if st_file.exists():
-            record_op("read", st_file, extra="phase=processed-state-read")
-            prev_hash = st_file.read_text(encoding="utf-8").strip()
-        else:
-            prev_hash = ""
-    except Exception:
-        prev_hash = ""
+    # Strict UTF-8 decoding round-trips exactly: this is the sha256 of raw's UTF-8 form.
+    cur_hash = hashlib.sha256(raw_bytes).hexdigest()
     if prev_hash == cur_hash:
+        if cur_stat and prev_stat != cur_stat:
+            # Same content, new stat (touched, or an old one-line marker): record it.
+            _write_processed_marker(st_file, cur_hash, cur_stat)
         return False
 
-    front, body = parse_frontmatter(raw)
+    front = _parse_front_cached(raw)
     thread = str(front.get("thread", sp.session_root.name)).strip() or sp.session_root.name
     mid = str(front.get("id", receipt_path.stem)).strip() or receipt_path.stem
     role = str(front.get("role", "unknown")).strip()
@@ -865,14 +1010,10 @@ def process_receipt(sp: SessionPaths, roles: List[str], receipt_path: Path, dry_
     # - Those forwarded messages will themselves generate receipts when processed by workers.
     # - The router must NOT forward receipts whose originating sender is `router`.
     if req_from == "router":
-        try:
-            mkdirp(st_file.parent)
-            safe_atomic_write(st_file, cur_hash + "\n", extra="phase=mark-processed")
-        except Exception as e:
-            LOG.warning("mark_processed_failed file=%s err=%s", st_file, e)
+        _write_processed_marker(st_file, cur_hash, cur_stat)
         return True
 
-    directives = parse_bus_send_directives(raw)
+    directives = _parse_directives_cached(raw)
     if directives:
         dispatch_from_receipt(
             sp,
@@ -889,7 +1030,10 @@ def process_receipt(sp: SessionPaths, roles: List[str], receipt_path: Path, dry_
     targets = receipt_targets(roles, front)
 
     # Keep the forwarded message short and stable; link to the receipt path for full details.
-    forwarded = "\n".join(
+    # The receipt itself is forwarded as its original bytes (minus trailing whitespace, as
+    # str.rstrip() would strip it) instead of being re-encoded inside one big str.
+    raw_end = len(raw_bytes) - len(raw[len(raw.rstrip()) :].encode("utf-8"))
+    forwarded_head = "\n".join(
         [
             f"Receipt forwarded by router.",
             "",
@@ -905,17 +1049,26 @@ def process_receipt(sp: SessionPaths, roles: List[str], receipt_path: Path, dry_
             "",
             "Receipt content (verbatim):",
             "```md",
-            raw.rstrip(),
+            "",
+        ]
+    )
+    forwarded_tail = "\n".join(
+        [
+            "",
             "```",
             "",
             "If follow-up work is needed, dispatch it via the bus (no shared-file edits):",
             f'  ./scripts/bus-send.sh --session {thread} --from <role> --to <role> --intent <intent> --message "<...>"',
         ]
     )
+    forwarded_parts = [
+        forwarded_head.encode("utf-8"),
+        memoryview(raw_bytes)[:raw_end],
+        forwarded_tail.rstrip().encode("utf-8"),
+    ]
 
     if not dry_run:
         for t in targets:
-            mkdirp(inbox_dir(sp, t))
             enqueue_bus_message(
                 sp,
                 to_role=t,
@@ -923,14 +1076,11 @@ def process_receipt(sp: SessionPaths, roles: List[str], receipt_path: Path, dry_
                 intent=intent,
                 thread=thread,
                 risk=risk,
-                body=forwarded,
+                body="",
+                body_parts=forwarded_parts,
             )
 
-    try:
-        mkdirp(st_file.parent)
-        safe_atomic_write(st_file, cur_hash + "\n", extra="phase=mark-processed")
-    except Exception as e:
-        LOG.warning("mark_processed_failed file=%s err=%s", st_file, e)
+    _write_processed_marker(st_file, cur_hash, cur_stat)
     return True
 
 
@@ -984,15 +1134,27 @@ def loop(session: str, poll_s: float, dry_run: bool) -> int:
             poll_s,
             dry_run,
         )
-        outbox = sp.bus / "outbox"
+        outbox = sp.outbox
+        # One long-lived registration per bus dir: the outbox wakes the loop, inbox
+        # changes only refresh the cached counts used by the heartbeat.
+        _dir_watcher().watch_many([outbox] + [inbox_dir(sp, r) for r in roles])
         next_hb = 0.0
+        scan = True
         while True:
             now = time.monotonic()
             if now >= next_hb:
-                log_heartbeat(sp, session=session, poll_s=poll_s)
+                log_heartbeat(sp, session=session, poll_s=poll_s, roles=roles)
                 next_hb = now + HEARTBEAT_SECONDS
+                # Full pass every heartbeat regardless, in case a watch event was missed, against
+                # markers re-validated from disk (hand-deleted markers replay their receipts).
+                n_markers = sync_processed_markers(sp)
+                LOG.debug("processed_markers_synced session=%s count=%s", session, n_markers)
+                scan = True
+            if not scan:
+                scan = _wait_for_dir_change(outbox, min(poll_s, next_hb - now))
+                continue
             did_any = False
-            outbox_files = [p for p in sorted(outbox.glob("*.md")) if p.is_file()]
+            outbox_files = _list_outbox(outbox)
             LOG.info("scan_outbox session=%s role=router outbox_count=%s", session, len(outbox_files))
             for p in outbox_files:
                 runtime_state["last_receipt_path"] = str(p)
@@ -1023,7 +1185,7 @@ def loop(session: str, poll_s: float, dry_run: bool) -> int:
                     quarantine_receipt(sp, p, f"unhandled processing error: {e}")
                     did_any = True
             if not did_any:
-                _wait_for_dir_change(outbox, poll_s)
+                scan = _wait_for_dir_change(outbox, poll_s)
     except KeyboardInterrupt:
         rc = 130
         LOG.error(
@@ -1085,11 +1247,11 @@ def run_once(session: str, dry_run: bool) -> int:
     for r in roles:
         mkdirp(inbox_dir(sp, r))
 
-    outbox = sp.bus / "outbox"
+    outbox = sp.outbox
     LOG.info("run_once_start session=%s role=router pid=%s dry_run=%s", session, os.getpid(), dry_run)
-    log_heartbeat(sp, session=session, poll_s=0.0)
+    log_heartbeat(sp, session=session, poll_s=0.0, roles=roles)
     did_any = False
-    outbox_files = [p for p in sorted(outbox.glob("*.md")) if p.is_file()]
+    outbox_files = _list_outbox(outbox)
     LOG.info("scan_outbox session=%s role=router outbox_count=%s", session, len(outbox_files))
     for p in outbox_files:
         try:
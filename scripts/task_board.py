@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import json
 import os
+import random
 import secrets
 import stat
 import subprocess
@@ -24,6 +25,7 @@ class TaskBoardPaths:
     file: Path
     lock: Path
     stale_dir: Path
+    by_owner: Path
 
 
 def _now() -> str:
@@ -43,6 +45,7 @@ def _board_paths(session_root: Path) -> TaskBoardPaths:
         file=td / "tasks.json",
         lock=td / "tasks.lockdir",
         stale_dir=td / "_stale_lockdirs",
+        by_owner=td / "by_owner",
     )
 
 
@@ -67,6 +70,40 @@ def _atomic_write_json(path: Path, data: Dict[str, object]) -> None:
     tmp.replace(path)
 
 
+def _set_current_task(session_root: Path, role: str, task_id: str) -> None:
+    """
+    Best-effort write of state/tasks/by_owner/<role>.current (empty = no task in progress).
+    Only called from _update_board, under the board lock.
+    """
+    role = role.strip()
+    if not role or "/" in role:
+        return
+    path = _board_paths(session_root).by_owner / f"{role}.current"
+    try:
+        _mkdirp(path.parent)
+        tmp = path.parent / f".tmp.{path.name}.{os.getpid()}"
+        tmp.write_text(task_id.strip() + "\n", encoding="utf-8")
+        tmp.replace(path)
+    except Exception:
+        return
+
+
+def current_task_id(session_root: Path, role: str) -> Optional[str]:
+    """
+    First in-progress task id owned by `role`, from the owner index ("" if none).
+    None if the index has never been written for this role.
+    """
+    role = role.strip()
+    if not role or "/" in role:
+        return None
+    try:
+        return (_board_paths(session_root).by_owner / f"{role}.current").read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    except Exception:
+        return None
+
+
 def _read_json(path: Path) -> Dict[str, object]:
     if not path.exists():
         return _default_board()
@@ -155,18 +192,15 @@ def _lock_age_seconds(lock_dir: Path) -> float:
 
 
 def _cleanup_lockdir(lock_dir: Path, stale_root: Path) -> None:
-    if not lock_dir.exists():
-        return
-    pid_file = lock_dir / "pid"
     try:
-        st = os.lstat(pid_file)
-        if stat.S_ISREG(st.st_mode):
-            pid_file.unlink(missing_ok=True)
-    except Exception:
+        os.unlink(lock_dir / "pid")
+    except OSError:
         pass
     try:
         os.rmdir(lock_dir)
         return
+    except FileNotFoundError:
+        return
     except Exception:
         pass
     try:
@@ -200,6 +234,8 @@ class DirLock:
         _mkdirp(self.lock_dir.parent)
         _mkdirp(self.stale_root)
         started = time.time()
+        # Board updates are short: retry quickly first, backing off (with jitter) to poll_s.
+        delay = min(0.005, self.poll_s)
         while True:
             try:
                 os.mkdir(self.lock_dir)
@@ -214,7 +250,8 @@ class DirLock:
                     continue
                 if time.time() - started > self.timeout_s:
                     raise TimeoutError(f"task-board lock timeout: {self.lock_dir}")
-                time.sleep(self.poll_s)
+                time.sleep(min(delay + random.uniform(0, delay / 2), self.poll_s))
+                delay = min(delay * 2, self.poll_s)
 
     def __exit__(self, exc_type, exc, tb) -> None:
         if self.owned:
@@ -285,6 +322,21 @@ def _sort_tasks(tasks: List[Dict[str, object]]) -> List[Dict[str, object]]:
     )
 
 
+def _in_progress_by_owner(board: Dict[str, object]) -> Dict[str, str]:
+    """
+    owner -> id of its first in-progress task in board order (what heartbeats report).
+    """
+    out: Dict[str, str] = {}
+    for t in _sort_tasks([t for t in board.get("tasks", []) if isinstance(t, dict)]):
+        if str(t.get("status", "")).strip() != "in_progress":
+            continue
+        owner = str(t.get("owner", "")).strip()
+        tid = str(t.get("id", "")).strip()
+        if owner and tid and owner not in out:
+            out[owner] = tid
+    return out
+
+
 def _update_board(
     session_root: Path,
     mutate_fn,
@@ -295,10 +347,16 @@ def _update_board(
     bp = _board_paths(session_root)
     with DirLock(bp.lock, stale_root=bp.stale_dir, timeout_s=timeout_s):
         board = _read_json(bp.file)
+        before = _in_progress_by_owner(board)
         result, changed = mutate_fn(board)
         if changed:
             board["updated_at"] = _now()
             _atomic_write_json(bp.file, board)
+            # Owner index follows the board write under the same lock, for owners that changed.
+            after = _in_progress_by_owner(board)
+            for owner in set(before) | set(after):
+                if before.get(owner, "") != after.get(owner, ""):
+                    _set_current_task(session_root, owner, after.get(owner, ""))
         return result
 
 
@@ -398,7 +456,69 @@ def add_task(
         tasks.append(task)
         return task, True
 
-    return _update_board(session_root, _mutate)
+    task = _update_board(session_root, _mutate)
+    # An (empty) receipt index born with the task lists all of its receipts from the start.
+    path = receipt_index_path(session_root, str(task.get("id", "")))
+    if path is not None:
+        try:
+            _mkdirp(path.parent)
+            with open(path, "a", encoding="utf-8"):
+                pass
+        except OSError:
+            pass
+    return task
+
+
+def receipt_index_path(session_root: Path, task_id: str) -> Optional[Path]:
+    """
+    state/receipt_index/<task_id>.jsonl (None for ids that are not safe file names).
+    """
+    tid = task_id.strip()
+    if not tid or "/" in tid or tid.startswith("."):
+        return None
+    return session_root / "state" / "receipt_index" / f"{tid}.jsonl"
+
+
+def _apply_dispatch(
+    board: Dict[str, object],
+    session_root: Path,
+    *,
+    task_id: str,
+    from_role: str,
+    to_role: str,
+    intent: str,
+    message_id: str,
+):
+    idx = _task_index(board, task_id)
+    if idx < 0:
+        return (False, None, "not_found"), False
+    tasks = board.get("tasks")
+    assert isinstance(tasks, list)
+    task = tasks[idx]
+    assert isinstance(task, dict)
+    prev = task.get("dispatch")
+    if isinstance(prev, dict):
+        prev_mid = str(prev.get("message_id", "")).strip()
+        if prev_mid:
+            if prev_mid == message_id.strip():
+                return (True, task, "already_dispatched_same"), False
+            status = str(task.get("status", "")).strip()
+            prev_to = str(prev.get("to", "")).strip() or to_role.strip()
+            stale, stale_reason = _dispatch_stale(session_root, prev_to, prev)
+            if status == "pending" and stale:
+                _history(task, action="redispatched", by=from_role.strip() or "system", note=stale_reason)
+            else:
+                return (False, task, "already_dispatched"), False
+    task["dispatch"] = {
+        "from": from_role.strip(),
+        "to": to_role.strip(),
+        "intent": intent.strip(),
+        "message_id": message_id.strip(),
+        "at": _now(),
+    }
+    task["updated_at"] = _now()
+    _history(task, action="dispatched", by=from_role.strip() or "system", note=message_id.strip())
+    return (True, task, "ok"), True
 
 
 def set_dispatch(
@@ -411,36 +531,47 @@ def set_dispatch(
     message_id: str,
 ) -> Tuple[bool, Optional[Dict[str, object]], str]:
     def _mutate(board: Dict[str, object]):
-        idx = _task_index(board, task_id)
-        if idx < 0:
-            return (False, None, "not_found"), False
-        tasks = board.get("tasks")
-        assert isinstance(tasks, list)
-        task = tasks[idx]
-        assert isinstance(task, dict)
-        prev = task.get("dispatch")
-        if isinstance(prev, dict):
-            prev_mid = str(prev.get("message_id", "")).strip()
-            if prev_mid:
-                if prev_mid == message_id.strip():
-                    return (True, task, "already_dispatched_same"), False
-                status = str(task.get("status", "")).strip()
-                prev_to = str(prev.get("to", "")).strip() or to_role.strip()
-                stale, stale_reason = _dispatch_stale(session_root, prev_to, prev)
-                if status == "pending" and stale:
-                    _history(task, action="redispatched", by=from_role.strip() or "system", note=stale_reason)
-                else:
-                    return (False, task, "already_dispatched"), False
-        task["dispatch"] = {
-            "from": from_role.strip(),
-            "to": to_role.strip(),
-            "intent": intent.strip(),
-            "message_id": message_id.strip(),
-            "at": _now(),
-        }
-        task["updated_at"] = _now()
-        _history(task, action="dispatched", by=from_role.strip() or "system", note=message_id.strip())
-        return (True, task, "ok"), True
+        return _apply_dispatch(
+            board,
+            session_root,
+            task_id=task_id,
+            from_role=from_role,
+            to_role=to_role,
+            intent=intent,
+            message_id=message_id,
+        )
+
+    return _update_board(session_root, _mutate)
+
+
+def set_dispatch_many(
+    session_root: Path,
+    entries: List[Dict[str, str]],
+) -> List[Tuple[bool, Optional[Dict[str, object]], str]]:
+    """
+    Apply several set_dispatch() calls under one board lock and one write.
+
+    Each entry carries the set_dispatch keyword arguments; results are returned in order.
+    """
+    if not entries:
+        return []
+
+    def _mutate(board: Dict[str, object]):
+        results = []
+        changed = False
+        for e in entries:
+            res, ch = _apply_dispatch(
+                board,
+                session_root,
+                task_id=e["task_id"],
+                from_role=e["from_role"],
+                to_role=e["to_role"],
+                intent=e["intent"],
+                message_id=e["message_id"],
+            )
+            results.append(res)
+            changed = changed or ch
+        return results, changed
 
     return _update_board(session_root, _mutate)
 
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+import sys
+
+
+def _import_dirwatch(scripts_dir: Path):
+    if str(scripts_dir) not in sys.path:
+        sys.path.insert(0, str(scripts_dir))
+    import dirwatch  # noqa: PLC0415
+
+    return dirwatch
+
+
+def _check_inactive(dirwatch, d: Path) -> None:
+    w = dirwatch.DirWatcher(use_kqueue=False, use_inotify=False)
+    assert not w.active, "watcher with no backend should be inactive"
+    assert w.watch(d) is False, "inactive watcher should refuse to watch"
+    t0 = time.monotonic()
+    assert w.wait_on(d, 0.05) is False, "inactive wait_on should report no change"
+    assert time.monotonic() - t0 >= 0.04, "inactive wait_on should sleep out the timeout"
+    assert w.wait(0.01) == set(), "inactive wait should report no change"
+    (d / "a.md").write_text("x", encoding="utf-8")
+    assert w.md_names(d) == ["a.md"], "inactive md_names should scan directly"
+    assert w.md_count(d) == 1
+    (d / "a.md").unlink()
+    w.close()
+
+
+def _check_active(dirwatch, d: Path) -> None:
+    w = dirwatch.DirWatcher(use_kqueue=True, use_inotify=True)
+    if not w.active:
+        print("SKIP active DirWatcher checks (no kqueue/inotify)")
+        return
+    try:
+        assert w.watch(d) is True, "expected watch to succeed"
+        assert w.watching(d)
+        assert w.md_names(d) == []
+
+        # Idle: times out without a change.
+        t0 = time.monotonic()
+        assert w.wait_on(d, 0.1) is False, "idle wait_on should time out"
+        assert time.monotonic() - t0 >= 0.09
+
+        # A create from another thread wakes the waiter before the timeout.
+        timer = threading.Timer(0.05, lambda: (d / "m1.md").write_text("x", encoding="utf-8"))
+        timer.start()
+        t0 = time.monotonic()
+        woke = w.wait_on(d, 5.0)
+        timer.join()
+        assert woke is True, "wait_on should wake on create"
+        assert time.monotonic() - t0 < 4.0, "wait_on should not run to the timeout"
+        assert w.md_names(d) == ["m1.md"], f"after create: {w.md_names(d)}"
+
+        # Temp files are not listed; a rename into *.md is.
+        (d / ".tmp.m2").write_text("y", encoding="utf-8")
+        assert w.md_names(d) == ["m1.md"]
+        os.rename(d / ".tmp.m2", d / "m2.md")
+        assert w.md_names(d) == ["m1.md", "m2.md"], f"after rename: {w.md_names(d)}"
+        os.rename(d / "m1.md", d / "m0.md")
+        assert w.md_names(d) == ["m0.md", "m2.md"], f"after rename: {w.md_names(d)}"
+
+        (d / "m0.md").unlink()
+        assert w.md_names(d) == ["m2.md"], f"after unlink: {w.md_names(d)}"
+        assert w.md_count(d) == 1
+    finally:
+        w.close()
+
+
+def main() -> int:
+    scripts_dir = Path(__file__).resolve().parents[1]
+    dirwatch = _import_dirwatch(scripts_dir)
+
+    with tempfile.TemporaryDirectory(prefix="dirwatch-") as td:
+        root = Path(td)
+        (root / "inactive").mkdir()
+        (root / "active").mkdir()
+        _check_inactive(dirwatch, root / "inactive")
+        _check_active(dirwatch, root / "active")
+
+    print("PASS test_dirwatch")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+import sys
+
+
+def _import_router(scripts_dir: Path):
+    if str(scripts_dir) not in sys.path:
+        sys.path.insert(0, str(scripts_dir))
+    import router  # noqa: PLC0415
+
+    return router
+
+
+def _marker_lines(path: Path) -> list:
+    return path.read_text(encoding="utf-8").split("\n")
+
+
+def main() -> int:
+    logging.disable(logging.CRITICAL)
+    scripts_dir = Path(__file__).resolve().parents[1]
+    router = _import_router(scripts_dir)
+
+    with tempfile.TemporaryDirectory(prefix="router-marker-") as td:
+        sp = router.session_paths(Path(td), "sid-marker")
+        router.ensure_dirs(sp)
+        roles = ["lead"]
+
+        receipt = sp.outbox / "m1.builder-a.md"
+        receipt.write_text(
+            "---\nid: m1\nrole: builder-a\nrequest_from: \"lead\"\nstatus: done\ncodex_rc: 0\n---\n\nok\n",
+            encoding="utf-8",
+        )
+        raw = receipt.read_bytes()
+        st = os.stat(receipt)
+        marker = router.processed_state_file(sp, receipt)
+
+        # New receipt: processed, marker is "sha256\nmtime_ns:size\n".
+        assert router.process_receipt(sp, roles, receipt, dry_run=True) is True
+        lines = _marker_lines(marker)
+        assert lines[0] == hashlib.sha256(raw).hexdigest(), f"marker hash: {lines!r}"
+        assert lines[1] == f"{st.st_mtime_ns}:{st.st_size}", f"marker stat: {lines!r}"
+        assert lines[2:] == [""], f"marker trailer: {lines!r}"
+        assert router.process_receipt(sp, roles, receipt, dry_run=True) is False, "unchanged receipt reprocessed"
+
+        # Old one-line marker (hash only): still recognised, and upgraded to the two-line form.
+        marker.write_text(hashlib.sha256(raw).hexdigest() + "\n", encoding="utf-8")
+        router.sync_processed_markers(sp)
+        assert router._read_processed_marker(marker) == (hashlib.sha256(raw).hexdigest(), "")
+        assert router.process_receipt(sp, roles, receipt, dry_run=True) is False, "one-line marker not honoured"
+        lines = _marker_lines(marker)
+        assert lines[1] == f"{st.st_mtime_ns}:{st.st_size}", f"one-line marker not upgraded: {lines!r}"
+
+        # Replay: deleting the marker by hand reprocesses the receipt after the next sync.
+        marker.unlink()
+        assert router.process_receipt(sp, roles, receipt, dry_run=True) is False, "cache not yet synced"
+        assert router.sync_processed_markers(sp) == 0
+        assert router.process_receipt(sp, roles, receipt, dry_run=True) is True, "deleted marker not replayed"
+        assert marker.is_file()
+
+        # A marker written by another process is picked up by the sync.
+        receipt2 = sp.outbox / "m2.builder-a.md"
+        receipt2.write_text("---\nid: m2\nrole: builder-a\nstatus: done\n---\n\nok\n", encoding="utf-8")
+        raw2 = receipt2.read_bytes()
+        st2 = os.stat(receipt2)
+        marker2 = router.processed_state_file(sp, receipt2)
+        marker2.write_text(f"{hashlib.sha256(raw2).hexdigest()}\n{st2.st_mtime_ns}:{st2.st_size}\n", encoding="utf-8")
+        assert router.sync_processed_markers(sp) == 2
+        assert router.process_receipt(sp, roles, receipt2, dry_run=True) is False, "external marker ignored"
+
+    print("PASS test_router_processed_marker")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
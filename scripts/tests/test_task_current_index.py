@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+import tempfile
+from pathlib import Path
+import sys
+
+
+def _import_task_board(scripts_dir: Path):
+    if str(scripts_dir) not in sys.path:
+        sys.path.insert(0, str(scripts_dir))
+    import task_board  # noqa: PLC0415
+
+    return task_board
+
+
+def _add(task_board, session_root: Path, title: str, owner: str) -> str:
+    t = task_board.add_task(
+        session_root,
+        title=title,
+        created_by="lead",
+        owner=owner,
+        work_type="implement",
+        risk="low",
+        acceptance=["ok"],
+        depends_on=[],
+        intent="implement",
+        source_message_id="",
+    )
+    tid = str(t.get("id", "")).strip()
+    assert tid, "missing task id"
+    return tid
+
+
+def main() -> int:
+    scripts_dir = Path(__file__).resolve().parents[1]
+    task_board = _import_task_board(scripts_dir)
+
+    with tempfile.TemporaryDirectory(prefix="task-current-index-") as td:
+        session_root = Path(td) / "sessions" / "sid-current-index"
+        session_root.mkdir(parents=True)
+
+        owned = _add(task_board, session_root, "owned", "builder-a")
+        unowned = _add(task_board, session_root, "unowned", "")
+        assert task_board.current_task_id(session_root, "builder-a") is None, "no index before any claim"
+
+        ok, _, r = task_board.claim_task(session_root, task_id=owned, role="builder-a", message_id="m1")
+        assert ok, f"claim failed: {r}"
+        cur = task_board.current_task_id(session_root, "builder-a")
+        assert cur == owned, f"after claim: {cur!r}"
+
+        # Claiming an unowned task must not replace the owned in-progress one.
+        ok, t, r = task_board.claim_next_task(session_root, role="builder-a", message_id="m2")
+        assert ok and str(t.get("id")) == unowned, f"claim_next failed: {r}"
+        cur = task_board.current_task_id(session_root, "builder-a")
+        assert cur == owned, f"after claiming an unowned task: {cur!r}"
+
+        # A retryable failure keeps the task in progress.
+        ok, _, r = task_board.mark_task_failed(session_root, task_id=owned, role="builder-a", error="flaky")
+        assert ok, f"mark failed: {r}"
+        cur = task_board.current_task_id(session_root, "builder-a")
+        assert cur == owned, f"after retryable failure: {cur!r}"
+
+        ok, _, r = task_board.complete_task(session_root, task_id=owned, role="builder-a", evidence="done")
+        assert ok, f"complete failed: {r}"
+        cur = task_board.current_task_id(session_root, "builder-a")
+        assert cur == "", f"after complete: {cur!r}"
+
+        second = _add(task_board, session_root, "second", "builder-a")
+        ok, _, r = task_board.claim_task(session_root, task_id=second, role="builder-a")
+        assert ok, f"claim second failed: {r}"
+        cur = task_board.current_task_id(session_root, "builder-a")
+        assert cur == second, f"after second claim: {cur!r}"
+
+        ok, _, r = task_board.mark_task_failed(
+            session_root, task_id=second, role="builder-a", error="fatal", terminal=True
+        )
+        assert ok, f"terminal failure failed: {r}"
+        cur = task_board.current_task_id(session_root, "builder-a")
+        assert cur == "", f"after terminal failure: {cur!r}"
+
+        # The index agrees with a full board scan for the owned role.
+        in_progress = [
+            t
+            for t in task_board.list_tasks(session_root, statuses=["in_progress"])
+            if str(t.get("owner", "")).strip() == "builder-a"
+        ]
+        assert not in_progress, f"unexpected in-progress tasks: {in_progress}"
+
+    print("PASS test_task_current_index")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())